@@ -1,6 +1,6 @@
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import Recipe, Tag
 
 
 class RecipeFilter(FilterSet):
@@ -11,15 +11,11 @@ class RecipeFilter(FilterSet):
     )
     is_favorited = filters.BooleanFilter()
     is_in_shopping_cart = filters.BooleanFilter()
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author')
 
-
-class IngredientFilter(FilterSet):
-    name = filters.CharFilter(lookup_expr='istartswith')
-
-    class Meta:
-        model = Ingredient
-        fields = ('name',)
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
@@ -0,0 +1,85 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from foodgram_backend.constants import QUERY_BUDGETS
+
+logger = logging.getLogger('api.query_metrics')
+
+
+class QueryCollector:
+    """Обёртка курсора, считающая SQL-запросы и время их выполнения."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def get_view_name(view_func, method):
+    """Имя эндпоинта вида ``RecipeViewSet.list``."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', repr(view_func))
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class QueryMetricsMiddleware:
+    """Число SQL-запросов, время БД и сериализации для каждого эндпоинта.
+
+    Включается настройкой ``QUERY_METRICS_ENABLED``. Время сериализации —
+    это время работы вьюхи и рендеринга ответа за вычетом времени БД.
+    Превышение бюджета из ``QUERY_BUDGETS`` логируется как предупреждение.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector()
+        start = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        view_name = getattr(request, 'metrics_view_name', None)
+        if view_name is None:
+            return response
+        db_ms = collector.duration * 1000
+        serialization_ms = max(total * 1000 - db_ms, 0)
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{collector.count} queries", '
+            f'app;dur={serialization_ms:.1f}'
+        )
+        budget = QUERY_BUDGETS.get(view_name)
+        log = (
+            logger.warning
+            if budget is not None and collector.count > budget
+            else logger.info
+        )
+        log(
+            '%s %s: %d queries (budget %s), db %.1f ms, serialization %.1f ms',
+            request.method,
+            view_name,
+            collector.count,
+            budget,
+            db_ms,
+            serialization_ms,
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view_name = get_view_name(view_func, request.method)
@@ -1,21 +1,227 @@
+from hashlib import md5
+
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.shortcuts import get_object_or_404
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    quote_etag,
+)
+from django.utils.http import http_date
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from recipes.cache import get_cache_version, make_cache_key
+from recipes.counters import increment
+
+from .serializers import IdListSerializer
 
 
 class PostDestroyMixin:
     """Создание и удаление записей в БД."""
 
-    def add_object(self, data, serializer_class):
-        serializer = serializer_class(
-            data=data,
-            context={"request": self.request},
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+    def add_object(
+        self, related_manager, obj, serializer_class, error, counter
+    ):
+        """Добавляет ``obj`` в связь одним INSERT.
+
+        Повторное добавление отсекает уникальное ограничение таблицы
+        связи, тогда ответ 400 с текстом ``error``. Счётчик ``counter``
+        у ``obj`` увеличивается в той же транзакции.
+        """
+        through = related_manager.through
+        try:
+            with transaction.atomic():
+                link = through.objects.create(
+                    **{
+                        related_manager.source_field_name: (
+                            related_manager.instance
+                        ),
+                        related_manager.target_field_name: obj,
+                    }
+                )
+                increment(
+                    related_manager.model.objects.filter(pk=obj.pk), counter
+                )
+        except IntegrityError:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [error]}
+            )
+        serializer = serializer_class(link, context={'request': self.request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    def destroy_object(self, obj, related_manager):
-        if related_manager.filter(id=obj.id).exists():
-            related_manager.remove(obj)
+    def add_objects(
+        self, related_manager, queryset, counter, exclude=(), on_add=None
+    ):
+        """Добавляет в связь ``related_manager`` объекты по списку id.
+
+        Один запрос находит объекты ``queryset``, второй вставляет связи и
+        возвращает id реально добавленных, третий увеличивает их счётчик
+        ``counter``. ``on_add`` получает те же id и выполняется в той же
+        транзакции. В ответе для каждого id статус: created, exists,
+        not_found или invalid (id из ``exclude``).
+        """
+        serializer = IdListSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        with transaction.atomic():
+            found = set(
+                queryset.filter(pk__in=ids)
+                .order_by()
+                .values_list('pk', flat=True)
+            )
+            added = set(
+                self.insert_links(
+                    related_manager,
+                    [pk for pk in ids if pk in found and pk not in exclude],
+                )
+            )
+            results = []
+            for pk in ids:
+                if pk in exclude:
+                    result = 'invalid'
+                elif pk not in found:
+                    result = 'not_found'
+                elif pk in added:
+                    result = 'created'
+                else:
+                    result = 'exists'
+                results.append({'id': pk, 'status': result})
+            if added:
+                added = [pk for pk in ids if pk in added]
+                increment(queryset.filter(pk__in=added), counter)
+                if on_add is not None:
+                    on_add(added)
+        return Response({'results': results})
+
+    def insert_links(self, related_manager, target_ids):
+        """Вставляет связи с ``target_ids`` и возвращает id вставленных.
+
+        Уже существующие связи пропускает ON CONFLICT DO NOTHING, а
+        RETURNING отдаёт только новые строки: связь, добавленная
+        параллельным запросом, не попадёт в счётчики и список покупок
+        дважды.
+        """
+        if not target_ids:
+            return []
+        meta = related_manager.through._meta
+        quote = connection.ops.quote_name
+        source = quote(
+            meta.get_field(related_manager.source_field_name).column
+        )
+        target = quote(
+            meta.get_field(related_manager.target_field_name).column
+        )
+        owner_id = related_manager.instance.pk
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(meta.db_table)} ({source}, {target}) '
+                f'VALUES {", ".join(["(%s, %s)"] * len(target_ids))} '
+                f'ON CONFLICT DO NOTHING RETURNING {target}',
+                [value for pk in target_ids for value in (owner_id, pk)],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def destroy_object(self, related_manager, pk, queryset, counter):
+        """Удаляет объект ``pk`` из связи одним DELETE.
+
+        Если удалять нечего, отдельный запрос к ``queryset`` отличает
+        несуществующий объект (404) от не добавленного (400). Иначе
+        счётчик ``counter`` уменьшается в той же транзакции.
+        """
+        with transaction.atomic():
+            deleted, _ = related_manager.through.objects.filter(
+                **{
+                    related_manager.source_field_name: (
+                        related_manager.instance
+                    ),
+                    f'{related_manager.target_field_name}_id': pk,
+                }
+            ).delete()
+            if deleted:
+                increment(queryset.filter(pk=pk), counter, -deleted)
+        if deleted:
             return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(queryset, pk=pk)
         return Response(status=status.HTTP_400_BAD_REQUEST)
+
+
+class AnonymousCacheMixin:
+    """Кеширование list/retrieve для анонимных пользователей.
+
+    Ключ включает версию пространства имён ``cache_namespace``, которую
+    сбрасывают сигналы при изменении данных.
+    """
+
+    cache_namespace = None
+    cache_timeout = None
+
+    def cached_response(self, request, handler, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+        # Ключи memcached ограничены 250 символами без пробелов.
+        key = make_cache_key(
+            self.cache_namespace,
+            'anon',
+            md5(request.build_absolute_uri().encode()).hexdigest(),
+        )
+        data = cache.get(key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            cache.set(key, data, self.cache_timeout)
+        return Response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """ETag, Last-Modified и Cache-Control для справочных данных.
+
+    Валидаторы строятся по версии пространства имён ``cache_namespace``,
+    поэтому ответ 304 отдаётся без обращения к БД и сериализации.
+    """
+
+    cache_namespace = None
+    cache_max_age = None
+
+    def conditional_response(self, request, handler, *args, **kwargs):
+        version = get_cache_version(self.cache_namespace)
+        etag = quote_etag(f'{self.cache_namespace}-{version}')
+        last_modified = version // 10 ** 9
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(
+            response, public=True, max_age=self.cache_max_age
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, super().retrieve, *args, **kwargs
+        )
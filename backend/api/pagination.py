@@ -1,6 +1,127 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
+from rest_framework.response import Response
 
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset-пагинация ленты рецептов без OFFSET.
+
+    Включается параметром ``?cursor=`` (пустое значение — первая страница).
+    Позиция курсора — пара ``(created_at, id)``: у рецептов с одинаковым
+    временем создания (массовый импорт) порядок однозначный, поэтому
+    страницы не теряют и не повторяют строки. Поле ``count`` в PostgreSQL
+    оценивается планировщиком, на остальных СУБД считается COUNT(*).
+    """
+
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.count = self.get_estimated_count(queryset)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor and self.cursor.position
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            created_at, pk = self.parse_position(position)
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'created_at__{lookup}': created_at})
+                | Q(created_at=created_at, **{f'id__{lookup}': pk})
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f'{instance.created_at.isoformat()}|{instance.pk}'
+
+    def parse_position(self, position):
+        created_at, _, pk = position.rpartition('|')
+        try:
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def get_next_link(self):
+        """Строки после последней на странице."""
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=False,
+                position=self._get_position_from_instance(
+                    self.page[-1], self.ordering
+                ),
+            )
+        )
+
+    def get_previous_link(self):
+        """Строки до первой на странице, в обратном порядке."""
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=True,
+                position=self._get_position_from_instance(
+                    self.page[0], self.ordering
+                ),
+            )
+        )
+
+    def get_estimated_count(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return queryset.order_by().count()
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']['Plan Rows']
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ('count', self.count),
+                    ('next', self.get_next_link()),
+                    ('previous', self.get_previous_link()),
+                    ('results', data),
+                ]
+            )
+        )
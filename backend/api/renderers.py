@@ -0,0 +1,21 @@
+from rest_framework.renderers import BaseRenderer
+
+
+class PlainTextRenderer(BaseRenderer):
+    """Рендерер ``?format=txt``; сообщения об ошибках выводит текстом."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = data.get('detail', data)
+        return str(data)
+
+
+class CSVRenderer(PlainTextRenderer):
+    """Рендерер ``?format=csv``."""
+
+    media_type = 'text/csv'
+    format = 'csv'
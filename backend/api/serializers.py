@@ -1,21 +1,35 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator, ValidationError
+
+from foodgram_backend.constants import (
+    AVATAR_IMAGE_VARIANTS,
+    MAX_BULK_IDS,
+    RECIPE_IMAGE_VARIANTS,
+)
 
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
-from users.models import ShoppingCart
+from users.models import Favorite, Follow, ShoppingCart, ShoppingListItem
 
-from .utils import Base64ImageField
-from .validators import validate_recipes_limit
+from .utils import Base64ImageField, ImageVariantsField, set_prefetched
 
 User = get_user_model()
+DOES_NOT_EXIST = serializers.PrimaryKeyRelatedField.default_error_messages[
+    'does_not_exist'
+]
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField(
+        {'card': RECIPE_IMAGE_VARIANTS['card']}, source='image'
+    )
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'cooking_time', 'image')
+        fields = ('id', 'name', 'cooking_time', 'image', 'image_variants')
 
 
 class FoodgramUserSerializer(UserSerializer):
@@ -23,6 +37,9 @@ class FoodgramUserSerializer(UserSerializer):
         read_only=True,
         default=False,
     )
+    avatar_variants = ImageVariantsField(
+        AVATAR_IMAGE_VARIANTS, source='avatar'
+    )
 
     class Meta:
         model = User
@@ -34,9 +51,13 @@ class FoodgramUserSerializer(UserSerializer):
             'last_name',
             'is_subscribed',
             'avatar',
+            'avatar_variants',
         )
 
     def get_is_subscribed(self, obj):
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
         request = self.context.get('request')
         return (
             request
@@ -67,9 +88,24 @@ class AvatarSerializers(serializers.ModelSerializer):
         fields = ('avatar',)
 
 
+class FollowListSerializer(serializers.ListSerializer):
+    """Рецепты всех авторов страницы загружаются одним запросом."""
+
+    def to_representation(self, data):
+        authors = list(data)
+        recipes = defaultdict(list)
+        if authors:
+            for recipe in Recipe.objects.filter(
+                author__in=authors
+            ).latest_per_author(self.child.get_recipes_limit()):
+                recipes[recipe.author_id].append(recipe)
+        for author in authors:
+            author.latest_recipes = recipes[author.pk]
+        return super().to_representation(authors)
+
+
 class FollowSerializer(FoodgramUserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -83,36 +119,35 @@ class FollowSerializer(FoodgramUserSerializer):
             'recipes_count',
             'is_subscribed',
             'avatar',
+            'avatar_variants',
         )
+        list_serializer_class = FollowListSerializer
+
+    def get_recipes_limit(self):
+        limit = self.context['request'].query_params.get('recipes_limit')
+        if limit and limit.isdigit():
+            return int(limit)
+        return None
 
     def get_recipes(self, obj):
-        recipes_limit = self.context.get('request').query_params.get(
-            'recipes_limit'
-        )
-        query = obj.user_recipes.all()
-        if recipes_limit:
-            try:
-                validate_recipes_limit(recipes_limit)
-                query = obj.user_recipes.all()[: int(recipes_limit)]
-            except ValidationError:
-                pass
-        serializer = RecipeBaseSerializer(
-            query,
-            many=True,
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            recipes = obj.user_recipes.all()
+            limit = self.get_recipes_limit()
+            if limit is not None:
+                recipes = recipes[:limit]
+        serializer = ShortRecipeSerializer(
+            instance=recipes, many=True, context=self.context
         )
         return serializer.data
 
-    def get_recipes_count(self, obj):
-        return len(obj.recipes.all())
 
-    def get_recipes(self, obj):
-        limit = self.context['request'].query_params.get('recipes_limit')
-        if limit and limit.isdigit():
-            queryset = obj.recipes.all()[:int(limit)]
-        else:
-            queryset = obj.recipes.all()
-        serializer = ShortRecipeSerializer(instance=queryset, many=True)
-        return serializer.data
+class IdListSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_IDS,
+    )
 
 
 class CreateShoppingSerializer(serializers.ModelSerializer):
@@ -122,13 +157,6 @@ class CreateShoppingSerializer(serializers.ModelSerializer):
             'user',
             'recipe',
         )
-        validators = [
-            UniqueTogetherValidator(
-                queryset=ShoppingCart.objects.all(),
-                fields=('user', 'recipe'),
-                message='Рецепт уже добавлен в корзину!',
-            )
-        ]
 
     def to_representation(self, instance):
         serializer = RecipeBaseSerializer(
@@ -138,6 +166,39 @@ class CreateShoppingSerializer(serializers.ModelSerializer):
         return serializer.data
 
 
+class CreateFavoriteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Favorite
+        fields = (
+            'user',
+            'recipe',
+        )
+
+    def to_representation(self, instance):
+        serializer = RecipeBaseSerializer(
+            instance.recipe,
+            context={'request': self.context.get('request')},
+        )
+        return serializer.data
+
+
+class CreateSubscribeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Follow
+        fields = (
+            'user',
+            'author',
+        )
+
+    def to_representation(self, instance):
+        instance.author.is_subscribed = True
+        serializer = FollowSerializer(
+            instance.author,
+            context={'request': self.context.get('request')},
+        )
+        return serializer.data
+
+
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
@@ -167,9 +228,8 @@ class IngredientDetailSerializer(serializers.ModelSerializer):
 
 
 class IngredientCreateSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-    )
+    # Ингредиенты по id загружает RecipeCreateSerializer.validate().
+    id = serializers.IntegerField()
 
     class Meta:
         model = RecipeIngredient
@@ -198,6 +258,7 @@ class RecipeSerializer(RecipeBaseSerializer):
     )
     is_favorited = serializers.BooleanField(read_only=True)
     is_in_shopping_cart = serializers.BooleanField(read_only=True)
+    image_variants = ImageVariantsField(RECIPE_IMAGE_VARIANTS, source='image')
 
     class Meta:
         model = Recipe
@@ -210,13 +271,20 @@ class RecipeSerializer(RecipeBaseSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
         )
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
     ingredients = IngredientCreateSerializer(many=True)
+    tags = serializers.ListField(child=serializers.IntegerField())
     image = Base64ImageField()
 
     class Meta:
@@ -238,8 +306,27 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             )
         if not attrs.get('tags'):
             raise serializers.ValidationError({'tags': 'Отсутствуют теги!'})
+        attrs['tags'] = self.get_objects('tags', Tag, attrs['tags'])
+        ingredients = self.get_objects(
+            'ingredients',
+            Ingredient,
+            [ingredient['id'] for ingredient in attrs['ingredients']],
+        )
+        for ingredient, obj in zip(attrs['ingredients'], ingredients):
+            ingredient['id'] = obj
         return super().validate(attrs)
 
+    @staticmethod
+    def get_objects(field, model, ids):
+        """Объекты по id одним запросом, в порядке ``ids``."""
+        objects = model.objects.order_by().in_bulk(ids)
+        missing = [pk for pk in ids if pk not in objects]
+        if missing:
+            raise serializers.ValidationError(
+                {field: [DOES_NOT_EXIST.format(pk_value=pk) for pk in missing]}
+            )
+        return [objects[pk] for pk in ids]
+
     def validate_ingredients(self, ingredients):
         if not ingredients:
             raise serializers.ValidationError(
@@ -273,26 +360,69 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data: dict):
         ingredients_data = validated_data.pop('ingredients')
         instance = super().create(validated_data)
-        instance.save()
         self.recipe_ingredient_create(instance, ingredients_data)
         return instance
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        ingredients_data = validated_data.get('ingredients')
-        tags_data = validated_data.get('tags')
-        instance.ingredients.clear()
-        instance.tags.clear()
-        instance.tags.set(tags_data)
-        RecipeIngredient.objects.filter(recipe=instance).delete()
-        self.recipe_ingredient_create(instance, ingredients_data)
-        instance.image = validated_data.get('image', instance.image)
-        instance.name = validated_data.get('name', instance.name)
-        instance.text = validated_data.get('text', instance.text)
-        instance.cooking_time = validated_data.get(
-            'cooking_time', instance.cooking_time
+        tags_data = validated_data.pop('tags', None)
+        ingredients_data = validated_data.pop('ingredients', None)
+        if tags_data is not None:
+            self.update_tags(instance, tags_data)
+        if ingredients_data is not None:
+            self.update_ingredients(instance, ingredients_data)
+        return super().update(instance, validated_data)
+
+    def update_tags(self, instance, tags_data):
+        """Добавляет и удаляет только изменившиеся теги."""
+        old = {tag.id for tag in instance.tags.all()}
+        new = {tag.id for tag in tags_data}
+        instance.tags.remove(*old - new)
+        instance.tags.add(*new - old)
+
+    def update_ingredients(self, instance, ingredients_data):
+        """Меняет только добавленные, удалённые и изменённые строки.
+
+        Старые строки берутся из prefetch вьюсета, а разница количеств
+        переносится в списки покупок.
+        """
+        rows = {
+            row.ingredient_id: row
+            for row in instance.recipe_to_ingredient.all()
+        }
+        old_amounts = {
+            ingredient_id: row.amount for ingredient_id, row in rows.items()
+        }
+        new_amounts = {
+            ingredient['id'].id: ingredient['amount']
+            for ingredient in ingredients_data
+        }
+        if old_amounts == new_amounts:
+            return
+        removed = old_amounts.keys() - new_amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=instance, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, amount in new_amounts.items():
+            row = rows.get(ingredient_id)
+            if row is not None and row.amount != amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        self.recipe_ingredient_create(
+            instance,
+            [
+                ingredient
+                for ingredient in ingredients_data
+                if ingredient['id'].id not in old_amounts
+            ],
+        )
+        ShoppingListItem.objects.change_recipe(
+            instance, old_amounts, new_amounts
         )
-        instance.save()
-        return instance
 
     def get_fields(self, *args, **kwargs):
         fields = super().get_fields(*args, **kwargs)
@@ -302,17 +432,42 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         return fields
 
     def to_representation(self, instance):
-        serializer = RecipeSerializer(
-            Recipe.objects.annotated_fields(
-                self.context.get('request').user
-            ).get(pk=instance.pk),
-            context=self.context,
-        )
-        return serializer.data
-
-
-class GetLinkSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Recipe
-        fields = ('short_link',)
+        """Ответ собирается из сохранённого объекта без повторной выборки.
+
+        Теги и ингредиенты берутся из validated_data, а если их нет в
+        запросе — из prefetch, с которым объект получен во вьюсете.
+        """
+        if 'tags' in self.validated_data:
+            set_prefetched(
+                instance,
+                'tags',
+                sorted(
+                    self.validated_data['tags'],
+                    key=lambda tag: (tag.name, tag.slug),
+                ),
+            )
+        if 'ingredients' in self.validated_data:
+            set_prefetched(
+                instance,
+                'recipe_to_ingredient',
+                sorted(
+                    (
+                        RecipeIngredient(
+                            recipe=instance,
+                            ingredient=ingredient['id'],
+                            amount=ingredient['amount'],
+                        )
+                        for ingredient in self.validated_data['ingredients']
+                    ),
+                    key=lambda item: item.ingredient.name,
+                ),
+            )
+        # Новый рецепт никто ещё не добавил, а на себя подписаться нельзя.
+        for field in (
+            'is_favorited',
+            'is_in_shopping_cart',
+            'author_is_subscribed',
+        ):
+            if not hasattr(instance, field):
+                setattr(instance, field, False)
+        return RecipeSerializer(instance, context=self.context).data
@@ -1,29 +1,115 @@
-from datetime import date
-
-from django.db.models import Sum
-from django.http import HttpResponse
-
-from recipes.models import IngredientRecipe
-
-
-def shopping_cart(self, request, author):
-    """Скачивание списка продуктов для выбранных рецептов пользователя."""
-    sum_ingredients_in_recipes = IngredientRecipe.objects.filter(
-        recipe__shopping_cart__author=author
-    ).values(
-        'ingredient__name', 'ingredient__measurement_unit'
-    ).annotate(
-        amounts=Sum('amount', distinct=True)).order_by('amounts')
-    today = date.today().strftime("%d-%m-%Y")
-    shopping_list = f'Список покупок на: {today}\n\n'
-    for ingredient in sum_ingredients_in_recipes:
-        shopping_list += (
-            f'{ingredient["ingredient__name"]} - '
-            f'{ingredient["amounts"]} '
-            f'{ingredient["ingredient__measurement_unit"]}\n'
+import csv
+import json
+
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_cache_control, quote_etag
+
+from recipes.cache import (
+    INGREDIENTS_NAMESPACE,
+    cart_namespace,
+    get_cache_version,
+)
+from recipes.models import MeasurementUnit
+from users.models import ShoppingListItem
+
+SHOPPING_LIST_CHUNK_SIZE = 500
+SHOPPING_LIST_CSV_HEADER = ('Ингредиент', 'Единица измерения', 'Количество')
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def get_shopping_list(user):
+    """Суммарное количество ингредиентов из корзины пользователя.
+
+    Количества переводятся в канонические единицы и суммируются одним
+    запросом с группировкой по названию и единице.
+    """
+    unit = MeasurementUnit.objects.filter(
+        name=OuterRef('ingredient__measurement_unit')
+    ).order_by()
+    return (
+        ShoppingListItem.objects.filter(user=user)
+        .values(
+            name=F('ingredient__name'),
+            measurement_unit=Coalesce(
+                Subquery(unit.values('canonical')),
+                F('ingredient__measurement_unit'),
+            ),
+        )
+        .annotate(
+            amount=Sum(
+                F('total_amount')
+                * Coalesce(Subquery(unit.values('factor')), Value(1))
+            )
+        )
+        .order_by('name', 'measurement_unit')
+        .iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
+    )
+
+
+def render_txt(ingredients):
+    for ingredient in ingredients:
+        yield (
+            f"— {ingredient['name']}, "
+            f"{ingredient['measurement_unit']}\t"
+            f"{ingredient['amount']}\n"
+        )
+
+
+def render_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(SHOPPING_LIST_CSV_HEADER)
+    for ingredient in ingredients:
+        yield writer.writerow(
+            (
+                ingredient['name'],
+                ingredient['measurement_unit'],
+                ingredient['amount'],
+            )
         )
-    shopping_list += '\n\nFoodgram (2022)'
-    filename = 'shopping_list.txt'
-    response = HttpResponse(shopping_list, content_type='text/plain')
-    response['Content-Disposition'] = f'attachment; filename={filename}'
+
+
+def render_json(ingredients):
+    separator = '['
+    for ingredient in ingredients:
+        yield separator + json.dumps(ingredient, ensure_ascii=False)
+        separator = ','
+    yield ']' if separator == ',' else '[]'
+
+
+SHOPPING_LIST_RENDERERS = {
+    'txt': (render_txt, 'text/plain'),
+    'csv': (render_csv, 'text/csv'),
+    'json': (render_json, 'application/json'),
+}
+
+
+def get_shopping_list_etag(user, export_format):
+    """ETag по версиям корзины и справочника ингредиентов, без запросов."""
+    return quote_etag(
+        f'cart-{user.id}-'
+        f'{get_cache_version(cart_namespace(user.id))}-'
+        f'{get_cache_version(INGREDIENTS_NAMESPACE)}-{export_format}'
+    )
+
+
+def shopping_list_response(user, export_format, etag):
+    """Потоковая выгрузка списка покупок в формате txt, csv или json."""
+    render, content_type = SHOPPING_LIST_RENDERERS[export_format]
+    response = StreamingHttpResponse(
+        render(get_shopping_list(user)),
+        content_type=f'{content_type}; charset=utf-8',
+    )
+    response['Content-Disposition'] = (
+        f'attachment;filename={user.username}-cart.{export_format}'
+    )
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
     return response
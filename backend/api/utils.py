@@ -1,14 +1,151 @@
 import base64
+import binascii
+from io import BytesIO
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile,
+    TemporaryUploadedFile,
+)
+from PIL import Image
 from rest_framework import serializers
 
+from recipes.images import variant_names, variant_ready
+
+BASE64_CHUNK_SIZE = 64 * 1024
+BASE64_WHITESPACE = ' \t\r\n'
+BASE64_STRIP = str.maketrans('', '', BASE64_WHITESPACE)
+
+
+class DecodedTemporaryFile(TemporaryUploadedFile):
+    """Временный файл вне request.FILES: Django его не закроет сам.
+
+    close() удаляет файл или молча пропускает, если хранилище уже
+    переместило его в MEDIA_ROOT.
+    """
+
+    def __del__(self):
+        self.close()
+
 
 class Base64ImageField(serializers.ImageField):
+    """Изображение из data URI (base64) или файла multipart-запроса.
+
+    Base64 декодируется по частям во временный файл, а размер в байтах и
+    в пикселях проверяется до того, как Pillow прочитает изображение
+    целиком: по длине строки и по заголовку файла.
+    """
+
+    default_error_messages = {
+        'invalid_base64': 'Некорректные данные изображения в base64.',
+        'too_large': 'Размер изображения больше {max_size} байт.',
+        'too_many_pixels': 'Изображение больше {max_pixels} пикселей.',
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = self.decode(data)
+        elif getattr(data, 'size', 0) > settings.MAX_IMAGE_UPLOAD_SIZE:
+            self.fail('too_large', max_size=settings.MAX_IMAGE_UPLOAD_SIZE)
+        self.check_pixels(data)
         return super().to_internal_value(data)
+
+    def decode(self, data):
+        header_end = data.find(';base64,')
+        if header_end == -1:
+            self.fail('invalid_base64')
+        ext = data[:header_end].split('/')[-1]
+        start = header_end + len(';base64,')
+        # Клиенты переносят base64 по строкам: пробелы не кодируют байты.
+        spaces = sum(data.count(char, start) for char in BASE64_WHITESPACE)
+        padding = data.rstrip()[-2:].count('=')
+        size = (len(data) - start - spaces) * 3 // 4 - padding
+        if size > settings.MAX_IMAGE_UPLOAD_SIZE:
+            self.fail('too_large', max_size=settings.MAX_IMAGE_UPLOAD_SIZE)
+        name = f'temp.{ext}'
+        content_type = f'image/{ext}'
+        if size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+            file = DecodedTemporaryFile(name, content_type, size, None)
+        else:
+            file = InMemoryUploadedFile(
+                BytesIO(), None, name, content_type, size, None
+            )
+        # Декодируются только целые группы по 4 символа, остаток без
+        # пробелов переносится в следующий кусок.
+        pending = ''
+        try:
+            for offset in range(start, len(data), BASE64_CHUNK_SIZE):
+                pending += data[offset:offset + BASE64_CHUNK_SIZE].translate(
+                    BASE64_STRIP
+                )
+                usable = len(pending) - len(pending) % 4
+                file.write(base64.b64decode(pending[:usable], validate=True))
+                pending = pending[usable:]
+            if pending:
+                raise binascii.Error('Incorrect padding')
+        except binascii.Error:
+            file.close()
+            self.fail('invalid_base64')
+        file.seek(0)
+        return file
+
+    def check_pixels(self, file):
+        if not hasattr(file, 'seek'):
+            return
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+        except (OSError, SyntaxError):
+            # Некорректный файл отклонит проверка ImageField.
+            return
+        finally:
+            file.seek(0)
+        if width * height > settings.MAX_IMAGE_PIXELS:
+            self.fail('too_many_pixels', max_pixels=settings.MAX_IMAGE_PIXELS)
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Ссылки на уменьшенные копии изображения по вариантам и форматам.
+
+    Пока фоновая задача не создала файлы варианта, вместо них отдаётся
+    ссылка на исходное изображение. Готовые варианты процесс запоминает,
+    к БД поле не обращается.
+    """
+
+    def __init__(self, variants, **kwargs):
+        self.variants = variants
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        request = self.context.get('request')
+
+        def url(name):
+            url = value.storage.url(name)
+            return request.build_absolute_uri(url) if request else url
+
+        variants = {}
+        for variant, formats in variant_names(
+            value.name, self.variants
+        ).items():
+            if not variant_ready(value.name, variant):
+                formats = dict.fromkeys(formats, value.name)
+            variants[variant] = {
+                image_format: url(name)
+                for image_format, name in formats.items()
+            }
+        return variants
+
+
+def set_prefetched(instance, name, objects):
+    """Кладёт уже известные объекты в кеш prefetch_related связи ``name``.
+
+    Так сериализатор читает ``instance.<name>.all()`` без запроса к БД.
+    """
+    cache = vars(instance).setdefault('_prefetched_objects_cache', {})
+    cache.pop(name, None)
+    queryset = getattr(instance, name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    cache[name] = queryset
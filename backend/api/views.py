@@ -1,35 +1,58 @@
-import os
-
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponseNotFound
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.generic.base import RedirectView
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.permissions import CurrentUserOrAdmin
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from foodgram_backend.constants import (
+    ANON_RECIPES_CACHE_TIMEOUT,
+    REFERENCE_CACHE_MAX_AGE,
+    SHORT_LINK_NEGATIVE_TIMEOUT,
+    SHORT_LINK_REDIRECT_MAX_AGE,
+)
+from recipes.cache import (
+    INGREDIENTS_NAMESPACE,
+    RECIPES_NAMESPACE,
+    TAGS_NAMESPACE,
+    bump_cache_version,
+    cart_namespace,
+)
+from recipes.ingredient_index import ingredient_index
 from recipes.models import Ingredient, Recipe, Tag, User
-
-from .filters import IngredientFilter, RecipeFilter
-from .mixins import PostDestroyMixin
-from .pagination import CustomPageNumberPagination
+from recipes.short_links import resolve, short_url
+from users.models import ShoppingListItem
+
+from .filters import RecipeFilter
+from .mixins import (
+    AnonymousCacheMixin,
+    ConditionalGetMixin,
+    PostDestroyMixin,
+)
+from .pagination import CustomPageNumberPagination, RecipeCursorPagination
 from .permissions import IsAuthorOrAdmin
+from .renderers import CSVRenderer, PlainTextRenderer
 from .serializers import (
     AvatarSerializers,
     CreateFavoriteSerializer,
     CreateShoppingSerializer,
     CreateSubscribeSerializer,
     FollowSerializer,
-    GetLinkSerializer,
     IngredientSerializer,
     RecipeSerializer,
     RecipeCreateSerializer,
     TagSerializer,
 )
+from .services import get_shopping_list_etag, shopping_list_response
 
 
 class FoodgramUserViewSet(UserViewSet, PostDestroyMixin):
@@ -37,6 +60,9 @@ class FoodgramUserViewSet(UserViewSet, PostDestroyMixin):
 
     pagination_class = CustomPageNumberPagination
 
+    def get_queryset(self):
+        return super().get_queryset().annotated_fields(self.request.user)
+
     def update(self, request, *args, **kwargs):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
@@ -79,7 +105,7 @@ class FoodgramUserViewSet(UserViewSet, PostDestroyMixin):
     )
     def subscriptions(self, request, *args, **kwargs):
         """Выводит информацию о подписках пользователей."""
-        follows = request.user.subscriptions.all()
+        follows = request.user.subscriptions.annotated_fields(request.user)
         page = self.paginate_queryset(follows)
         if page:
             serializer = FollowSerializer(
@@ -103,44 +129,99 @@ class FoodgramUserViewSet(UserViewSet, PostDestroyMixin):
     )
     def subscribe(self, request, id=None, **kwargs):
         """Добавляет подписку."""
-        data = {
-            'author': get_object_or_404(User, pk=id).id,
-            'user': request.user.id,
-        }
-        return self.add_object(data, CreateSubscribeSerializer)
+        author = get_object_or_404(User, pk=id)
+        if author == request.user:
+            raise ValidationError(
+                {
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        'Невозможно подписаться на себя!'
+                    ]
+                }
+            )
+        return self.add_object(
+            request.user.subscriptions,
+            author,
+            CreateSubscribeSerializer,
+            'Вы уже подписаны на этого пользователя!',
+            'followers_count',
+        )
+
+    @action(
+        ['post'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='subscribe',
+    )
+    def bulk_subscribe(self, request, *args, **kwargs):
+        """Подписывает на нескольких авторов одним запросом."""
+        return self.add_objects(
+            request.user.subscriptions,
+            User.objects.all(),
+            'followers_count',
+            exclude=(request.user.id,),
+        )
 
     @subscribe.mapping.delete
     def delete_subscribe(self, request, id=None, **kwargs):
         """Удаляет подписку пользователя."""
         return self.destroy_object(
-            get_object_or_404(User, pk=id), self.request.user.subscriptions
+            request.user.subscriptions,
+            id,
+            User.objects.all(),
+            'followers_count',
         )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для работы с тегами."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    cache_namespace = TAGS_NAMESPACE
+    cache_max_age = REFERENCE_CACHE_MAX_AGE
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для работы с ингредиентами."""
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filter_backends = (DjangoFilterBackend,)
-    filterset_class = IngredientFilter
+    cache_namespace = INGREDIENTS_NAMESPACE
+    cache_max_age = REFERENCE_CACHE_MAX_AGE
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, self.search)
 
+    def search(self, request):
+        """Автодополнение по индексу в памяти, без запросов к БД."""
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return Response(ingredient_index.all())
 
-class RecipeViewSet(viewsets.ModelViewSet, PostDestroyMixin):
+
+class RecipeViewSet(
+    AnonymousCacheMixin, viewsets.ModelViewSet, PostDestroyMixin
+):
     """Вьюсет для работы с рецептами."""
 
+    cache_namespace = RECIPES_NAMESPACE
+    cache_timeout = ANON_RECIPES_CACHE_TIMEOUT
     pagination_class = CustomPageNumberPagination
     serializer_class = RecipeSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    @property
+    def paginator(self):
+        if (
+            not hasattr(self, '_paginator')
+            and RecipeCursorPagination.cursor_query_param
+            in self.request.query_params
+        ):
+            self._paginator = RecipeCursorPagination()
+        return super().paginator
+
     def get_queryset(self):
         return Recipe.objects.annotated_fields(self.request.user)
 
@@ -160,15 +241,15 @@ class RecipeViewSet(viewsets.ModelViewSet, PostDestroyMixin):
         return self.serializer_class
 
     @action(['get'], detail=True, url_path='get-link')
-    def get_link(self, request, *args, **kwargs):
-        """Выводит короткую ссылку на текущий рецепт."""
-        serializer = GetLinkSerializer(self.get_object())
-        return Response(
-            {
-                'short-link': f"{os.getenv('HOST_NAME')}/s/"
-                f"{serializer.data.get('short_link')}/"
-            }
-        )
+    def get_link(self, request, pk=None, **kwargs):
+        """Выводит короткую ссылку на текущий рецепт.
+
+        Читает одно поле через кеш коротких ссылок, минуя get_queryset().
+        """
+        link = short_url(int(pk)) if pk.isdigit() else None
+        if link is None:
+            raise Http404
+        return Response({'short-link': link})
 
     @action(
         ['post'],
@@ -178,17 +259,34 @@ class RecipeViewSet(viewsets.ModelViewSet, PostDestroyMixin):
     )
     def favorite(self, request, id=None, **kwargs):
         """Реализует добавление рецептов в избранное."""
-        data = {
-            'recipe': get_object_or_404(Recipe, pk=id).id,
-            'user': request.user.id,
-        }
-        return self.add_object(data, CreateFavoriteSerializer)
+        return self.add_object(
+            request.user.favorites,
+            get_object_or_404(Recipe, pk=id),
+            CreateFavoriteSerializer,
+            'Рецепт уже добавлен в избранное!',
+            'favorites_count',
+        )
+
+    @action(
+        ['post'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite',
+    )
+    def bulk_favorite(self, request, *args, **kwargs):
+        """Добавляет в избранное несколько рецептов одним запросом."""
+        return self.add_objects(
+            request.user.favorites, Recipe.objects.all(), 'favorites_count'
+        )
 
     @favorite.mapping.delete
     def delete_favorite(self, request, id=None, **kwargs):
         """Удаляет подписку пользователя."""
         return self.destroy_object(
-            get_object_or_404(Recipe, pk=id), self.request.user.favorites
+            request.user.favorites,
+            id,
+            Recipe.objects.all(),
+            'favorites_count',
         )
 
     @action(
@@ -199,43 +297,66 @@ class RecipeViewSet(viewsets.ModelViewSet, PostDestroyMixin):
     )
     def shopping_cart(self, request, id=None, **kwargs):
         """Реализует добавление рецептов в избранное."""
-        data = {
-            'recipe': get_object_or_404(Recipe, pk=id).id,
-            'user': request.user.id,
-        }
-        return self.add_object(data, CreateShoppingSerializer)
+        return self.add_object(
+            request.user.shopping_cart,
+            get_object_or_404(Recipe, pk=id),
+            CreateShoppingSerializer,
+            'Рецепт уже добавлен в корзину!',
+            'in_carts_count',
+        )
+
+    @action(
+        ['post'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart',
+    )
+    def bulk_shopping_cart(self, request, *args, **kwargs):
+        """Добавляет в корзину несколько рецептов одним запросом.
+
+        bulk_create не вызывает сигналы ShoppingCart, поэтому список
+        покупок и кеш корзины обновляются здесь.
+        """
+        user = request.user
+
+        def add_to_shopping_list(recipe_ids):
+            ShoppingListItem.objects.add_recipes(
+                (user.id, recipe_id) for recipe_id in recipe_ids
+            )
+            bump_cache_version(cart_namespace(user.id))
+
+        return self.add_objects(
+            user.shopping_cart,
+            Recipe.objects.all(),
+            'in_carts_count',
+            on_add=add_to_shopping_list,
+        )
 
     @shopping_cart.mapping.delete
     def delete_shopping_cart(self, request, id=None, **kwargs):
         """Удаляет подписку пользователя."""
         return self.destroy_object(
-            get_object_or_404(Recipe, pk=id), self.request.user.shopping_cart
+            request.user.shopping_cart,
+            id,
+            Recipe.objects.all(),
+            'in_carts_count',
         )
 
-    @action(['get'], detail=False, url_path='download_shopping_cart')
+    @action(
+        ['get'],
+        detail=False,
+        url_path='download_shopping_cart',
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(PlainTextRenderer, CSVRenderer, JSONRenderer),
+    )
     def download_shopping_cart(self, request, *args, **kwargs):
-        """Загрузка списка покупок."""
-        shopping_cart = ''
-        user = request.user
-        ingredients = (
-            Ingredient.objects.filter(
-                ingredient_to_recipe__recipe__shopping=user
-            )
-            .annotate(total_amount=Sum('ingredient_to_recipe__amount'))
-            .values('name', 'measurement_unit', 'total_amount')
-            .order_by('name')
-        )
-        for ingredient in ingredients:
-            shopping_cart += (
-                f"— {ingredient['name']}, "
-                f"{ingredient['measurement_unit']}\t"
-                f"{ingredient['total_amount']}\n"
-            )
-        response = HttpResponse(shopping_cart, content_type='text/plain')
-        response['Content-Disposition'] = (
-            f'attachment;filename={user.username}-cart.txt'
-        )
-        return response
+        """Загрузка списка покупок в формате txt, csv или json."""
+        export_format = request.accepted_renderer.format
+        etag = get_shopping_list_etag(request.user, export_format)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+        return shopping_list_response(request.user, export_format, etag)
 
 
 class ShortLinkRedirect(RedirectView):
@@ -246,6 +367,15 @@ class ShortLinkRedirect(RedirectView):
     pattern_name = "recipe-detail"
 
     def get(self, request, *args, **kwargs):
-        object_url = kwargs['short_link']
-        obj = get_object_or_404(Recipe, short_link=object_url)
-        return redirect(f"{os.getenv('HOST_NAME')}{obj.get_absolute_url()}")
+        recipe_id = resolve(kwargs['short_link'])
+        if recipe_id is None:
+            response = HttpResponseNotFound()
+            max_age = SHORT_LINK_NEGATIVE_TIMEOUT
+        else:
+            response = redirect(
+                f'{settings.HOST_NAME}'
+                f'{Recipe(pk=recipe_id).get_absolute_url()}'
+            )
+            max_age = SHORT_LINK_REDIRECT_MAX_AGE
+        patch_cache_control(response, public=True, max_age=max_age)
+        return response
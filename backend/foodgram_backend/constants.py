@@ -12,3 +12,67 @@ LENGTH_INGREDIENT_NAME = 128
 LENGTH_MEASUREMENT_UNIT = 64
 MAX_RECIPES_LIMIT = 999999999999999999
 MAX_INGREDIENT_AMOUNT = 32_000
+ANON_RECIPES_CACHE_TIMEOUT = 60
+REFERENCE_CACHE_MAX_AGE = 300
+# Запросов на один вызов эндпоинта, включая аутентификацию по токену.
+QUERY_BUDGETS = {
+    'RecipeViewSet.list': 5,
+    'RecipeViewSet.retrieve': 4,
+    'RecipeViewSet.create': 9,
+    'RecipeViewSet.partial_update': 20,
+    'RecipeViewSet.bulk_favorite': 6,
+    'RecipeViewSet.bulk_shopping_cart': 13,
+    'FoodgramUserViewSet.bulk_subscribe': 6,
+    'RecipeViewSet.favorite': 6,
+    'RecipeViewSet.delete_favorite': 5,
+    'RecipeViewSet.shopping_cart': 12,
+    'RecipeViewSet.delete_shopping_cart': 13,
+    'FoodgramUserViewSet.subscribe': 7,
+    'FoodgramUserViewSet.delete_subscribe': 5,
+    'FoodgramUserViewSet.list': 3,
+    'FoodgramUserViewSet.subscriptions': 4,
+    'IngredientViewSet.list': 2,
+    'TagViewSet.list': 2,
+    'RecipeViewSet.download_shopping_cart': 2,
+    'RecipeViewSet.get_link': 2,
+    'RecipeViewSet.destroy': 18,
+    'FoodgramUserViewSet.retrieve': 2,
+    'FoodgramUserViewSet.create': 6,
+    'FoodgramUserViewSet.me': 2,
+    'FoodgramUserViewSet.set_password': 2,
+    'FoodgramUserViewSet.avatar': 3,
+    'FoodgramUserViewSet.delete_avatar': 2,
+    'TokenCreateView.post': 4,
+    'TokenDestroyView.post': 2,
+    'TagViewSet.retrieve': 2,
+    'IngredientViewSet.retrieve': 2,
+}
+# Сколько id можно передать в одном массовом запросе.
+MAX_BULK_IDS = 100
+# Варианты изображений: (ширина, высота) и обрезать ли до точного размера.
+RECIPE_IMAGE_VARIANTS = {
+    'card': ((600, 400), True),
+    'detail': ((1200, 900), False),
+}
+AVATAR_IMAGE_VARIANTS = {
+    'thumb': ((128, 128), True),
+}
+IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+IMAGE_VARIANT_QUALITY = 80
+# Сколько готовых вариантов изображений помнит процесс.
+IMAGE_VARIANT_LRU_SIZE = 10_000
+LENGTH_JOB_TASK = 128
+JOB_MAX_ATTEMPTS = 5
+# Пауза перед повтором задачи в секундах, удваивается с каждой попыткой.
+JOB_RETRY_DELAY = 10
+# Предельная пауза обработчика между попытками после сбоя БД, с.
+JOB_CLAIM_MAX_BACKOFF = 60
+JOB_TIMEOUT_ERROR = 'Задача зависла, попытки исчерпаны.'
+SHORT_LINK_LENGTH = 10
+SHORT_LINK_LRU_SIZE = 10_000
+# Сколько секунд помнить, что короткой ссылки нет.
+SHORT_LINK_NEGATIVE_TIMEOUT = 60
+SHORT_LINK_REDIRECT_MAX_AGE = 3600
+# Сколько секунд найденная ссылка живёт в LRU процесса: удаление рецепта
+# в другом процессе сбрасывает только общий кеш.
+SHORT_LINK_LOCAL_TIMEOUT = 300
@@ -18,6 +18,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework.authtoken',
     'rest_framework',
     'django_filters',
@@ -25,6 +26,7 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
     'recipes.apps.RecipesConfig',
     'users.apps.UsersConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
@@ -35,6 +37,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.QueryMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram_backend.urls'
@@ -126,4 +129,57 @@ DJOSER = {
         'user': ['rest_framework.permissions.IsAuthenticatedOrReadOnly'],
         'user_list': ['rest_framework.permissions.AllowAny'],
     },
-}
\ No newline at end of file
+}
+
+# Кеш общий для backend, worker и команд manage.py: в нём версии данных,
+# по которым сбрасываются ETag, индекс ингредиентов и кеш ленты. В Docker
+# это memcached. Без MEMCACHED_LOCATION (разработка, тесты) кеш живёт в
+# памяти процесса: проверка ETag по-прежнему обходится без БД, но
+# изменения из manage.py сервер увидит только после перезапуска.
+if os.getenv('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('MEMCACHED_LOCATION'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Адрес сайта в коротких ссылках на рецепты.
+HOST_NAME = os.getenv('HOST_NAME', '')
+
+# Ограничения загружаемых изображений (base64 и multipart).
+MAX_IMAGE_UPLOAD_SIZE = int(
+    os.getenv('MAX_IMAGE_UPLOAD_SIZE', 10 * 1024 * 1024)
+)
+MAX_IMAGE_PIXELS = int(os.getenv('MAX_IMAGE_PIXELS', 40_000_000))
+# JSON-запрос с изображением в base64 на треть больше самого файла.
+DATA_UPLOAD_MAX_MEMORY_SIZE = MAX_IMAGE_UPLOAD_SIZE * 4 // 3 + 1024 * 1024
+
+# Выполнять фоновые задачи сразу после коммита, без обработчика run_jobs.
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False') == 'True'
+
+QUERY_METRICS_ENABLED = os.getenv('QUERY_METRICS_ENABLED', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.query_metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'jobs': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
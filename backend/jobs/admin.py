@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = [
+        'task',
+        'status',
+        'attempts',
+        'created_at',
+        'wait',
+        'duration',
+    ]
+    list_filter = ['status', 'task']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
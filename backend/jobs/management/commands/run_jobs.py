@@ -0,0 +1,71 @@
+import signal
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Выполняет отложенные задачи из очереди в БД.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди, с.',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=300,
+            help='Через сколько секунд зависшая задача выдаётся повторно.',
+        )
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=7,
+            help='Сколько дней хранить выполненные задачи.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Вывести статистику по задачам и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            return self.print_stats()
+        Job.objects.filter(
+            status=Job.Status.DONE,
+            finished_at__lt=timezone.now()
+            - timedelta(days=options['keep_days']),
+        ).delete()
+        worker = Worker(
+            options['threads'],
+            options['poll_interval'],
+            timedelta(seconds=options['timeout']),
+        )
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+        self.stdout.write(f'Обработчик {worker.name} запущен.')
+        worker.run(once=options['once'])
+
+    def print_stats(self):
+        for row in Job.objects.stats():
+            self.stdout.write(
+                f"{row['task']}: выполнено {row['done']}, "
+                f"ошибок {row['failed']}, в очереди {row['pending']}, "
+                f"ожидание {row['avg_wait'] or 0:.3f} с, "
+                f"выполнение {row['avg_duration'] or 0:.3f} с "
+                f"(макс. {row['max_duration'] or 0:.3f} с)"
+            )
@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Avg, Count, F, Max, Q
+from django.utils import timezone
+
+from foodgram_backend.constants import (
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_DELAY,
+    JOB_TIMEOUT_ERROR,
+    LENGTH_JOB_TASK,
+)
+
+
+class JobQuerySet(models.QuerySet):
+    def claim(self, worker, limit, timeout):
+        """Забирает готовые к запуску задачи и помечает их запущенными.
+
+        Задачи, которые слишком долго числятся запущенными (процесс
+        обработчика упал), выдаются повторно: доставка «хотя бы раз».
+        Зависшие задачи с исчерпанными попытками помечаются ошибочными.
+        Параллельные обработчики в PostgreSQL пропускают чужие строки
+        благодаря SKIP LOCKED.
+        """
+        now = timezone.now()
+        stale = Q(status=Job.Status.RUNNING, started_at__lt=now - timeout)
+        with transaction.atomic(using=self.db):
+            self.filter(stale, attempts__gte=F('max_attempts')).update(
+                status=Job.Status.FAILED,
+                finished_at=now,
+                error=JOB_TIMEOUT_ERROR,
+            )
+            jobs = list(
+                self.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=Job.Status.PENDING, run_at__lte=now)
+                    | stale & Q(attempts__lt=F('max_attempts'))
+                )
+                .order_by('run_at')[:limit]
+            )
+            self.filter(pk__in=[job.pk for job in jobs]).update(
+                status=Job.Status.RUNNING,
+                worker=worker,
+                started_at=now,
+                attempts=F('attempts') + 1,
+            )
+        for job in jobs:
+            job.status = Job.Status.RUNNING
+            job.worker = worker
+            job.started_at = now
+            job.attempts += 1
+        return jobs
+
+    def stats(self):
+        """Число задач, среднее ожидание и время выполнения по типам."""
+        return (
+            self.values('task')
+            .annotate(
+                done=Count('pk', filter=Q(status=Job.Status.DONE)),
+                failed=Count('pk', filter=Q(status=Job.Status.FAILED)),
+                pending=Count('pk', filter=Q(status=Job.Status.PENDING)),
+                avg_wait=Avg('wait'),
+                avg_duration=Avg('duration'),
+                max_duration=Max('duration'),
+            )
+            .order_by('task')
+        )
+
+
+class Job(models.Model):
+    """Отложенная задача для фонового обработчика run_jobs."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'в очереди'
+        RUNNING = 'running', 'выполняется'
+        DONE = 'done', 'выполнена'
+        FAILED = 'failed', 'ошибка'
+
+    task = models.CharField(
+        verbose_name='Задача', max_length=LENGTH_JOB_TASK
+    )
+    payload = models.JSONField(verbose_name='Аргументы', default=dict)
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=max(len(value) for value in Status.values),
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток', default=0
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток', default=JOB_MAX_ATTEMPTS
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запустить после', default=timezone.now
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(
+        verbose_name='Обработчик', max_length=LENGTH_JOB_TASK, blank=True
+    )
+    wait = models.FloatField(
+        verbose_name='Ожидание в очереди, с', null=True, blank=True
+    )
+    duration = models.FloatField(
+        verbose_name='Время выполнения, с', null=True, blank=True
+    )
+    error = models.TextField(verbose_name='Ошибка', blank=True)
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'задача'
+        verbose_name_plural = 'Задачи'
+        ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=('status', 'run_at'), name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
+
+    def finish(self, duration, error=''):
+        """Сохраняет результат; при ошибке откладывает повтор."""
+        now = timezone.now()
+        self.duration = duration
+        self.wait = (self.started_at - self.created_at).total_seconds()
+        self.error = error
+        if not error:
+            self.status = self.Status.DONE
+        elif self.attempts < self.max_attempts:
+            self.status = self.Status.PENDING
+            self.run_at = now + timedelta(
+                seconds=JOB_RETRY_DELAY * 2 ** (self.attempts - 1)
+            )
+        else:
+            self.status = self.Status.FAILED
+        self.finished_at = now
+        self.save(
+            update_fields=(
+                'status',
+                'run_at',
+                'finished_at',
+                'wait',
+                'duration',
+                'error',
+            )
+        )
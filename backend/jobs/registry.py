@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import transaction
+
+TASKS = {}
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу.
+
+    ``func.delay(**payload)`` ставит задачу в очередь в текущей
+    транзакции, поэтому обработчик увидит её только после коммита.
+    Аргументы должны сериализоваться в JSON. При ``JOBS_EAGER``
+    задача выполняется сразу после коммита, без обработчика.
+    """
+    name = f'{func.__module__}.{func.__name__}'
+    TASKS[name] = func
+
+    def delay(**payload):
+        from .models import Job
+
+        if settings.JOBS_EAGER:
+            transaction.on_commit(lambda: func(**payload))
+            return None
+        return Job.objects.create(task=name, payload=payload)
+
+    func.delay = delay
+    return func
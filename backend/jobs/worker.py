@@ -0,0 +1,97 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import DatabaseError, close_old_connections
+
+from foodgram_backend.constants import JOB_CLAIM_MAX_BACKOFF
+
+from .models import Job
+from .registry import TASKS
+
+logger = logging.getLogger('jobs')
+
+
+class Worker:
+    """Забирает задачи из таблицы и выполняет их в пуле потоков."""
+
+    def __init__(self, threads, poll_interval, timeout):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopped = threading.Event()
+
+    def run(self, once=False):
+        """Держит в работе до ``threads`` задач.
+
+        Новые задачи забираются по мере освобождения потоков, а не после
+        завершения всей пачки: долгая задача не задерживает остальные.
+        """
+        running = set()
+        backoff = self.poll_interval
+        with ThreadPoolExecutor(self.threads) as pool:
+            while not self.stopped.is_set():
+                free = self.threads - len(running)
+                try:
+                    jobs = (
+                        Job.objects.claim(self.name, free, self.timeout)
+                        if free
+                        else []
+                    )
+                except DatabaseError:
+                    # Сбой БД или оборванное соединение не останавливает
+                    # обработчик: пауза растёт до JOB_CLAIM_MAX_BACKOFF.
+                    logger.exception(
+                        'Не удалось забрать задачи, повтор через %.1f с',
+                        backoff,
+                    )
+                    close_old_connections()
+                    self.stopped.wait(backoff)
+                    backoff = min(backoff * 2, JOB_CLAIM_MAX_BACKOFF)
+                    continue
+                backoff = self.poll_interval
+                running.update(pool.submit(self.execute, job) for job in jobs)
+                if running:
+                    running = wait(
+                        running,
+                        timeout=self.poll_interval,
+                        return_when=FIRST_COMPLETED,
+                    ).not_done
+                elif once:
+                    break
+                else:
+                    self.stopped.wait(self.poll_interval)
+
+    def stop(self, *args):
+        """Завершает работу после выполняющихся задач."""
+        self.stopped.set()
+
+    def execute(self, job):
+        started = time.monotonic()
+        error = ''
+        try:
+            func = TASKS.get(job.task)
+            if func is None:
+                raise LookupError(f'Задача {job.task} не зарегистрирована.')
+            func(**job.payload)
+        except Exception:
+            error = traceback.format_exc()
+        try:
+            job.finish(time.monotonic() - started, error)
+            logger.log(
+                logging.ERROR if error else logging.INFO,
+                '%s #%s: %s, попытка %s, ожидание %.3f с, выполнение %.3f с',
+                job.task,
+                job.pk,
+                job.status,
+                job.attempts,
+                job.wait,
+                job.duration,
+            )
+        finally:
+            close_old_connections()
@@ -2,7 +2,14 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
-from .models import Ingredient, Recipe, RecipeIngredient, Tag
+from .cache import RECIPES_NAMESPACE, bump_cache_version
+from .models import (
+    Ingredient,
+    MeasurementUnit,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+)
 
 User = get_user_model()
 
@@ -21,19 +28,16 @@ class RecipeAdmin(admin.ModelAdmin):
         'cooking_time',
         'tags',
         'short_link',
-        'favorite_count',
+        'favorites_count',
+        'in_carts_count',
     ]
-    readonly_fields = ['short_link', 'favorite_count']
+    readonly_fields = ['short_link', 'favorites_count', 'in_carts_count']
     filter_horizontal = ('tags',)
     inlines = [RecipeIngredientInline]
-    list_display = ['name', 'author']
+    list_display = ['name', 'author', 'favorites_count']
     search_fields = ['author__username', 'name']
     list_filter = ['tags']
 
-    @admin.display(description="Количество добавлений в избранное")
-    def favorite_count(self, obj):
-        return obj.favorites.count()
-
     def save_model(self, request, obj, form, change):
         obj.author = request.user
         super().save_model(request, obj, form, change)
@@ -45,6 +49,12 @@ class IngredientAdmin(admin.ModelAdmin):
     search_fields = ['name']
 
 
+@admin.register(MeasurementUnit)
+class MeasurementUnitAdmin(admin.ModelAdmin):
+    list_display = ['name', 'canonical', 'factor']
+    search_fields = ['name', 'canonical']
+
+
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     list_display = ['name']
@@ -52,5 +62,19 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(RecipeIngredient)
 class RecipeIngredientAdmin(admin.ModelAdmin):
+    """Правка строк без сохранения рецепта: кеш ленты сбрасывается здесь."""
+
     list_display = ['recipe', 'ingredient']
     search_fields = ['recipe']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_cache_version(RECIPES_NAMESPACE)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_cache_version(RECIPES_NAMESPACE)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_cache_version(RECIPES_NAMESPACE)
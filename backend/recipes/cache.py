@@ -0,0 +1,51 @@
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+RECIPES_NAMESPACE = 'recipes'
+INGREDIENTS_NAMESPACE = 'ingredients'
+TAGS_NAMESPACE = 'tags'
+STALE_CACHE_WARNING = (
+    'Кеш в памяти процесса: перезапустите сервер, чтобы он увидел изменения.'
+)
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def cart_namespace(user_id):
+    """Пространство имён корзины покупок пользователя."""
+    return f'cart:{user_id}'
+
+
+def get_cache_version(namespace):
+    """Текущая версия данных пространства имён кеша.
+
+    Версия — время последнего изменения в наносекундах, поэтому она не
+    повторяется после перезапуска и годится для Last-Modified.
+    """
+    return cache.get_or_set(_version_key(namespace), time.time_ns, None)
+
+
+def bump_cache_version(namespace):
+    """Инвалидирует все ключи пространства имён сменой версии."""
+    cache.set(_version_key(namespace), time.time_ns(), None)
+
+
+def bump_cache_versions(namespaces):
+    version = time.time_ns()
+    cache.set_many(
+        {_version_key(namespace): version for namespace in namespaces}, None
+    )
+
+
+def is_process_local():
+    """Кеш в памяти процесса: сброс версий из manage.py не увидит сервер."""
+    return isinstance(caches['default'], LocMemCache)
+
+
+def make_cache_key(namespace, *parts):
+    version = get_cache_version(namespace)
+    return ':'.join(str(part) for part in (namespace, version, *parts))
@@ -0,0 +1,61 @@
+"""Денормализованные счётчики и их сверка с таблицами связей."""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Favorite, Follow, ShoppingCart
+
+from .models import Recipe
+
+User = get_user_model()
+
+# Счётчик: модель со счётчиком, модель связи и её поле-ссылка.
+COUNTERS = {
+    'favorites_count': (Recipe, Favorite, 'recipe'),
+    'in_carts_count': (Recipe, ShoppingCart, 'recipe'),
+    'recipes_count': (User, Recipe, 'author'),
+    'followers_count': (User, Follow, 'author'),
+}
+
+
+def increment(queryset, counter, delta=1):
+    """Сдвигает ``counter`` у строк ``queryset`` на ``delta`` одним UPDATE.
+
+    Строки, где счётчик ушёл бы ниже нуля (расхождение), не меняются.
+    """
+    if delta < 0:
+        queryset = queryset.filter(**{f'{counter}__gte': -delta})
+    return queryset.update(**{counter: F(counter) + delta})
+
+
+def actual_count(related_model, field):
+    """Число строк ``related_model``, ссылающихся на объект полем ``field``."""
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(count=Count('pk'))
+            .values('count')
+        ),
+        0,
+    )
+
+
+def reconcile(counter, queryset=None, dry_run=False):
+    """Пересчитывает ``counter`` одним UPDATE для строк с расхождением.
+
+    Возвращает число таких строк; с ``dry_run`` ничего не меняет.
+    """
+    model, related_model, field = COUNTERS[counter]
+    if queryset is None:
+        queryset = model.objects.all()
+    actual = actual_count(related_model, field)
+    drifted = (
+        queryset.annotate(actual=actual)
+        .exclude(**{counter: F('actual')})
+        .values('pk')
+    )
+    if dry_run:
+        return drifted.count()
+    return model.objects.filter(pk__in=drifted).update(**{counter: actual})
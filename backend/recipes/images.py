@@ -0,0 +1,97 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from foodgram_backend.constants import (
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANT_LRU_SIZE,
+    IMAGE_VARIANT_QUALITY,
+)
+
+from .short_links import LRUCache
+
+VARIANTS_DIR = 'variants'
+VARIANT_LOCK_TIMEOUT = 60
+
+# Варианты, все файлы которых уже есть в хранилище. Файлы не удаляются
+# и не меняются, поэтому запоминаются только найденные.
+ready_variants = LRUCache(IMAGE_VARIANT_LRU_SIZE)
+
+
+def variant_name(name, variant, image_format):
+    """Путь варианта в хранилище, однозначно выводимый из исходного."""
+    stem = PurePosixPath(name).with_suffix('')
+    return f'{VARIANTS_DIR}/{variant}/{stem}.{image_format}'
+
+
+def variant_names(name, variants):
+    return {
+        variant: {
+            image_format: variant_name(name, variant, image_format)
+            for image_format in IMAGE_VARIANT_FORMATS
+        }
+        for variant in variants
+    }
+
+
+def variant_ready(name, variant):
+    """Созданы ли все форматы варианта; проверяет хранилище один раз."""
+    key = (name, variant)
+    if ready_variants.get(key):
+        return True
+    if not all(
+        default_storage.exists(variant_name(name, variant, image_format))
+        for image_format in IMAGE_VARIANT_FORMATS
+    ):
+        return False
+    ready_variants.set(key, True)
+    return True
+
+
+def render_variant(image, size, crop, image_format):
+    if crop:
+        # Обрезка до пропорций size без увеличения маленьких изображений.
+        scale = min(1, image.width / size[0], image.height / size[1])
+        size = (round(size[0] * scale), round(size[1] * scale))
+        image = ImageOps.fit(image, size, Image.LANCZOS)
+    else:
+        image = image.copy()
+        image.thumbnail(size, Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=IMAGE_VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def generate_variants(name, variants):
+    """Создаёт недостающие варианты изображения ``name``.
+
+    Уже созданные файлы не пересчитываются, а блокировка в кеше не даёт
+    двум процессам обрабатывать одно изображение одновременно, поэтому
+    каждый вариант создаётся один раз. Возвращает число новых файлов.
+    """
+    missing = [
+        (variant, image_format, target)
+        for variant, formats in variant_names(name, variants).items()
+        for image_format, target in formats.items()
+        if not default_storage.exists(target)
+    ]
+    lock = f'{VARIANTS_DIR}:lock:{name}'
+    if not missing or not cache.add(lock, True, VARIANT_LOCK_TIMEOUT):
+        return 0
+    try:
+        with default_storage.open(name) as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            image = image.convert('RGB')
+        for variant, image_format, target in missing:
+            size, crop = variants[variant]
+            default_storage.save(
+                target,
+                ContentFile(render_variant(image, size, crop, image_format)),
+            )
+    finally:
+        cache.delete(lock)
+    return len(missing)
@@ -0,0 +1,84 @@
+from bisect import bisect_left, bisect_right
+from threading import Lock
+
+from .cache import INGREDIENTS_NAMESPACE, get_cache_version
+
+
+def normalize(value):
+    """Ключ поиска: регистр сложен, «ё» приравнена к «е»."""
+    return value.casefold().replace('ё', 'е').replace('\n', ' ')
+
+
+class IngredientIndex:
+    """Отсортированный индекс ингредиентов в памяти процесса.
+
+    Загружается при первом обращении и перестраивается, когда сменилась
+    версия пространства имён ``ingredients``. Версия хранится в общем
+    кеше (CACHES), поэтому загрузка из load_ingredients или другого
+    процесса видна без перезапуска. Ключи также склеены в одну строку,
+    чтобы поиск по подстроке шёл через ``str.find``.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._state = (None, [], [], '', [])
+
+    def _load(self):
+        from .models import Ingredient
+
+        version = get_cache_version(INGREDIENTS_NAMESPACE)
+        if self._state[0] == version:
+            return self._state
+        with self._lock:
+            if self._state[0] == version:
+                return self._state
+            items = sorted(
+                (
+                    (normalize(row['name']), row)
+                    for row in Ingredient.objects.values(
+                        'id', 'name', 'measurement_unit'
+                    )
+                ),
+                key=lambda item: (item[0], item[1]['id']),
+            )
+            keys = [key for key, _ in items]
+            offsets = []
+            offset = 0
+            for key in keys:
+                offsets.append(offset)
+                offset += len(key) + 1
+            self._state = (
+                version,
+                keys,
+                [row for _, row in items],
+                '\n'.join(keys),
+                offsets,
+            )
+        return self._state
+
+    def all(self):
+        return list(self._load()[2])
+
+    def search(self, query):
+        """Сначала совпадения по началу названия, затем по подстроке."""
+        _, keys, rows, text, offsets = self._load()
+        query = normalize(query)
+        if not query:
+            return list(rows)
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        contains = []
+        position = text.find(query)
+        while position != -1:
+            index = bisect_right(offsets, position) - 1
+            if index < start or index >= end:
+                contains.append(rows[index])
+            if index + 1 == len(offsets):
+                break
+            position = text.find(query, offsets[index + 1])
+        return rows[start:end] + contains
+
+
+ingredient_index = IngredientIndex()
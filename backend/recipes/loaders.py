@@ -0,0 +1,146 @@
+import csv
+import json
+import re
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from .cache import (
+    STALE_CACHE_WARNING,
+    bump_cache_versions,
+    is_process_local,
+)
+
+JSON_CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'\s*')
+
+
+def iter_json_array(file, chunk_size=JSON_CHUNK_SIZE):
+    """Элементы JSON-массива по одному, без чтения файла целиком.
+
+    В памяти держится кусок файла и текущий элемент.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+
+    def read_more():
+        nonlocal buffer, position
+        chunk = file.read(chunk_size)
+        if chunk:
+            buffer = buffer[position:] + chunk
+            position = 0
+        return bool(chunk)
+
+    # Что допустимо дальше: '[', элемент или ']', ',' или ']', элемент.
+    expected = '['
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            if not read_more():
+                raise CommandError('JSON-массив оборвался.')
+            continue
+        char = buffer[position]
+        if expected == '[':
+            if char != '[':
+                raise CommandError('Ожидался JSON-массив.')
+            expected = 'first'
+            position += 1
+        elif char == ']' and expected != 'value':
+            return
+        elif expected == ',':
+            if char != ',':
+                raise CommandError(f'Некорректный JSON-массив: {char!r}.')
+            expected = 'value'
+            position += 1
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not read_more():
+                    raise CommandError('Некорректный элемент JSON-массива.')
+                continue
+            # Число на границе куска могло прочитаться не полностью.
+            if end == len(buffer) and read_more():
+                continue
+            yield value
+            expected = ','
+            position = end
+
+
+def read_rows(path, fields):
+    """Построчно читает CSV без заголовка, JSON-массив или NDJSON.
+
+    ``fields`` — имена колонок CSV по порядку, ``None`` пропускает колонку.
+    """
+    path = Path(path)
+    if path.suffix == '.csv':
+        with open(path, encoding='utf-8', newline='') as file:
+            for row in csv.reader(file):
+                if row:
+                    yield {
+                        field: value.strip()
+                        for field, value in zip(fields, row)
+                        if field
+                    }
+        return
+    with open(path, encoding='utf-8') as file:
+        if path.suffix == '.json':
+            rows = iter_json_array(file)
+        elif path.suffix in ('.ndjson', '.jsonl'):
+            rows = (json.loads(line) for line in file if line.strip())
+        else:
+            raise CommandError(f'Неизвестный формат файла: {path.name}')
+        for row in rows:
+            yield {field: row[field] for field in fields if field}
+
+
+def bulk_load(model, rows, batch_size):
+    """Вставляет строки пачками, пропуская уже существующие.
+
+    Возвращает число прочитанных и добавленных строк.
+    """
+    rows = iter(rows)
+    read = 0
+    with transaction.atomic():
+        before = model.objects.count()
+        while batch := [model(**row) for row in islice(rows, batch_size)]:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            read += len(batch)
+        return read, model.objects.count() - before
+
+
+class LoadCommand(BaseCommand):
+    """Загрузка справочника из CSV или JSON.
+
+    bulk_create не отправляет сигналы, поэтому версии кеша из
+    ``cache_namespaces`` сбрасываются явно. Сервер видит сброс только
+    через общий кеш (CACHES), иначе команда предупреждает о перезапуске.
+    """
+
+    model = None
+    fields = ()
+    default_path = None
+    cache_namespaces = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=self.default_path)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, path, batch_size, **options):
+        if not Path(path).is_file():
+            raise CommandError(f'Файл не найден: {path}')
+        read, created = bulk_load(
+            self.model, read_rows(path, self.fields), batch_size
+        )
+        bump_cache_versions(self.cache_namespaces)
+        if is_process_local():
+            self.stderr.write(self.style.WARNING(STALE_CACHE_WARNING))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Прочитано {read}, добавлено {created}, '
+                f'уже были в БД {read - created}.'
+            )
+        )
@@ -0,0 +1,40 @@
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+DEFAULT_QUERIES = ('м', 'мо', 'мол', 'моло', 'сах', 'соль', 'ябл', 'кар')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает автодополнение ингредиентов через ORM '
+        '(name__istartswith) и через индекс в памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=DEFAULT_QUERIES)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, queries, repeat, **options):
+        ingredient_index.all()
+        for name, search in (
+            (
+                'ORM',
+                lambda query: list(
+                    Ingredient.objects.filter(
+                        name__istartswith=query
+                    ).values('id', 'name', 'measurement_unit')
+                ),
+            ),
+            ('индекс', ingredient_index.search),
+        ):
+            seconds = timeit(
+                lambda: [search(query) for query in queries], number=repeat
+            )
+            self.stdout.write(
+                f'{name}: {seconds / repeat / len(queries) * 1e6:.1f} мкс '
+                f'на запрос'
+            )
@@ -0,0 +1,67 @@
+from timeit import timeit
+
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from api.views import ShortLinkRedirect
+from recipes.cache import is_process_local
+from recipes.models import Recipe
+from recipes.short_links import local_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет число перенаправлений /s/<short_link>/ в секунду '
+        'с холодным и прогретым кешем ссылок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--links', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, links, repeat, **options):
+        codes = list(
+            Recipe.objects.values_list('short_link', flat=True)[:links]
+        )
+        if not codes:
+            raise CommandError('В БД нет рецептов.')
+        # Каждая десятая ссылка — несуществующая.
+        codes += [f'zz{index:08d}' for index in range(len(codes) // 10)]
+        backend = type(caches['default']).__name__
+        self.stdout.write(f'Общий кеш: {backend}')
+        if is_process_local():
+            self.stderr.write(
+                self.style.WARNING(
+                    'Кеш в памяти процесса: строка «только общий кеш» '
+                    'не покажет сетевую задержку. Задайте MEMCACHED_LOCATION.'
+                )
+            )
+        factory = RequestFactory()
+        view = ShortLinkRedirect.as_view()
+        requests = [factory.get(f'/s/{code}/') for code in codes]
+        keys = [f'short-link:{code}' for code in codes]
+
+        def cold():
+            for request, code, key in zip(requests, codes, keys):
+                local_cache.pop(code)
+                cache.delete(key)
+                view(request, short_link=code)
+
+        def shared():
+            local_cache.clear()
+            for request, code in zip(requests, codes):
+                view(request, short_link=code)
+
+        def warm():
+            for request, code in zip(requests, codes):
+                view(request, short_link=code)
+
+        for name, run in (
+            ('холодный кеш (запрос в БД)', cold),
+            (f'только общий кеш ({backend})', shared),
+            ('прогретый LRU', warm),
+        ):
+            warm()
+            rate = len(codes) * repeat / timeit(run, number=repeat)
+            self.stdout.write(f'{name}: {rate:.0f} перенаправлений/с')
@@ -0,0 +1,85 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from recipes.models import Recipe
+from users.models import Favorite, FoodgramUser, ShoppingCart
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет БД избранным и корзинами (по умолчанию 1M строк), '
+        'выводит планы запросов is_favorited / is_in_shopping_cart '
+        'и откатывает изменения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--per-user', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(**options)
+            self.explain(user)
+            transaction.set_rollback(True)
+
+    def seed(self, users, recipes, per_user, batch_size, **options):
+        authors = FoodgramUser.objects.bulk_create(
+            (
+                FoodgramUser(
+                    email=f'explain{index}@example.com',
+                    username=f'explain{index}',
+                    first_name='План',
+                    last_name=str(index),
+                )
+                for index in range(users)
+            ),
+            batch_size=batch_size,
+        )
+        recipe_ids = [
+            recipe.id
+            for recipe in Recipe.objects.bulk_create(
+                (
+                    Recipe(
+                        author=authors[index % users],
+                        name=f'Рецепт {index}',
+                        text='Описание рецепта',
+                        image='recipes/images/explain.png',
+                        cooking_time=1,
+                    )
+                    for index in range(recipes)
+                ),
+                batch_size=batch_size,
+            )
+        ]
+        per_user = min(per_user, len(recipe_ids))
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create(
+                (
+                    model(user=author, recipe_id=recipe_id)
+                    for author in authors
+                    for recipe_id in random.sample(recipe_ids, per_user)
+                ),
+                batch_size=batch_size,
+            )
+        self.stdout.write(
+            f'Создано {users * per_user} строк избранного и корзины.'
+        )
+        with connection.cursor() as cursor:
+            for model in (Recipe, Favorite, ShoppingCart):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        return authors[0]
+
+    def explain(self, user):
+        options = {}
+        if connection.vendor == 'postgresql':
+            options = {'analyze': True, 'buffers': True}
+        queryset = Recipe.objects.annotated_fields(user)
+        for name in ('is_favorited', 'is_in_shopping_cart'):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}=1'))
+            self.stdout.write(
+                queryset.filter(**{name: True})[:6].explain(**options)
+            )
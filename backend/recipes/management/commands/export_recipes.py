@@ -0,0 +1,62 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает рецепты в NDJSON: одна строка — один рецепт. '
+        'Изображения указываются путём в MEDIA_ROOT.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, path, batch_size, **options):
+        if path == '-':
+            count = self.export(sys.stdout, batch_size)
+        else:
+            with open(path, 'w', encoding='utf-8') as file:
+                count = self.export(file, batch_size)
+        self.stderr.write(f'Выгружено рецептов: {count}.')
+
+    def export(self, file, batch_size):
+        count = 0
+        for recipe in self.iterate(batch_size):
+            file.write(
+                json.dumps(self.serialize(recipe), ensure_ascii=False) + '\n'
+            )
+            count += 1
+        return count
+
+    def iterate(self, batch_size):
+        """Обходит рецепты пачками по возрастанию id с prefetch связей."""
+        queryset = Recipe.objects.with_related().order_by('pk')
+        last_pk = 0
+        while batch := list(queryset.filter(pk__gt=last_pk)[:batch_size]):
+            yield from batch
+            last_pk = batch[-1].pk
+
+    def serialize(self, recipe):
+        return {
+            'author': recipe.author.email,
+            'name': recipe.name,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'image': recipe.image.name,
+            'short_link': recipe.short_link,
+            'created_at': recipe.created_at.isoformat(),
+            'tags': [tag.slug for tag in recipe.tags.all()],
+            'ingredients': [
+                {
+                    'name': item.ingredient.name,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                    'amount': item.amount,
+                }
+                for item in recipe.recipe_to_ingredient.all()
+            ],
+        }
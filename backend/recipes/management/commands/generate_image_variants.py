@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from foodgram_backend.constants import (
+    AVATAR_IMAGE_VARIANTS,
+    RECIPE_IMAGE_VARIANTS,
+)
+from recipes.images import generate_variants
+from recipes.models import Recipe, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт недостающие уменьшенные копии фото рецептов и аватаров, '
+        'загруженных до появления вариантов.'
+    )
+
+    def handle(self, *args, **options):
+        created = failed = 0
+        for names, variants in (
+            (
+                Recipe.objects.exclude(image='').values_list(
+                    'image', flat=True
+                ),
+                RECIPE_IMAGE_VARIANTS,
+            ),
+            (
+                User.objects.exclude(avatar='')
+                .exclude(avatar__isnull=True)
+                .values_list('avatar', flat=True),
+                AVATAR_IMAGE_VARIANTS,
+            ),
+        ):
+            for name in names.iterator():
+                try:
+                    created += generate_variants(name, variants)
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Создано файлов: {created}, ошибок: {failed}.'
+            )
+        )
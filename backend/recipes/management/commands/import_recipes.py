@@ -0,0 +1,159 @@
+import json
+import sys
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from recipes.cache import (
+    RECIPES_NAMESPACE,
+    STALE_CACHE_WARNING,
+    bump_cache_version,
+    is_process_local,
+)
+from recipes.counters import increment
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает рецепты из NDJSON, созданного export_recipes. '
+        'Рецепты с уже существующей короткой ссылкой пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Число рецептов в одной транзакции.',
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        self.authors = dict(User.objects.values_list('email', 'pk'))
+        self.tags = dict(Tag.objects.values_list('slug', 'pk'))
+        self.ingredients = dict(Ingredient.objects.values_list('name', 'pk'))
+        self.created = self.skipped = 0
+        if path == '-':
+            self.load(sys.stdin, batch_size)
+        else:
+            with open(path, encoding='utf-8') as file:
+                self.load(file, batch_size)
+        bump_cache_version(RECIPES_NAMESPACE)
+        if is_process_local():
+            self.stderr.write(self.style.WARNING(STALE_CACHE_WARNING))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Добавлено рецептов: {self.created}, '
+                f'пропущено: {self.skipped}.'
+            )
+        )
+
+    def load(self, file, batch_size):
+        lines = (
+            (number, json.loads(line))
+            for number, line in enumerate(file, 1)
+            if line.strip()
+        )
+        while batch := list(islice(lines, batch_size)):
+            with transaction.atomic():
+                self.insert(batch)
+
+    def resolve(self, number, data):
+        """Рецепт без сохранения или None, если ссылки не найдены."""
+        try:
+            fields = {
+                'author_id': self.authors[data['author']],
+                'name': data['name'],
+                'text': data['text'],
+                'cooking_time': data['cooking_time'],
+                'image': data['image'],
+            }
+            if data.get('short_link'):
+                # Иначе ShortUUIDField сгенерирует ссылку впустую.
+                fields['short_link'] = data['short_link']
+            recipe = Recipe(**fields)
+            recipe.source_created_at = parse_datetime(
+                data.get('created_at') or ''
+            )
+            recipe.tag_ids = [self.tags[slug] for slug in data['tags']]
+            recipe.amounts = [
+                (self.ingredients[item['name']], item['amount'])
+                for item in data['ingredients']
+            ]
+        except KeyError as error:
+            self.stderr.write(f'Строка {number}: не найдено {error}.')
+            return None
+        return recipe
+
+    def insert(self, batch):
+        recipes = [self.resolve(number, data) for number, data in batch]
+        recipes = [recipe for recipe in recipes if recipe is not None]
+        seen = set(
+            Recipe.objects.filter(
+                short_link__in=[recipe.short_link for recipe in recipes]
+            ).values_list('short_link', flat=True)
+        )
+        unique = []
+        # Повтор ссылки внутри пачки оборвал бы её IntegrityError.
+        for recipe in recipes:
+            if recipe.short_link not in seen:
+                seen.add(recipe.short_link)
+                unique.append(recipe)
+        recipes = unique
+        self.skipped += len(batch) - len(recipes)
+        Recipe.objects.bulk_create(recipes)
+        if recipes and recipes[0].pk is None:
+            pks = dict(
+                Recipe.objects.filter(
+                    short_link__in=[recipe.short_link for recipe in recipes]
+                ).values_list('short_link', 'pk')
+            )
+            for recipe in recipes:
+                recipe.pk = pks[recipe.short_link]
+        self.restore_created_at(recipes)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe_id=recipe.pk, ingredient_id=ingredient_id, amount=amount
+            )
+            for recipe in recipes
+            for ingredient_id, amount in recipe.amounts
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe in recipes
+            for tag_id in recipe.tag_ids
+        )
+        self.count_recipes(recipes)
+        self.created += len(recipes)
+
+    def restore_created_at(self, recipes):
+        """Возвращает исходное время создания, чтобы сохранить порядок ленты.
+
+        bulk_create проставляет текущее время (auto_now_add), а bulk_update
+        записывает значение как есть.
+        """
+        restored = []
+        for recipe in recipes:
+            if recipe.source_created_at is not None:
+                recipe.created_at = recipe.source_created_at
+                restored.append(recipe)
+        Recipe.objects.bulk_update(restored, ('created_at',))
+
+    def count_recipes(self, recipes):
+        """Увеличивает recipes_count авторов: bulk_create не шлёт сигналы.
+
+        Авторы с одинаковым числом новых рецептов обновляются одним UPDATE.
+        """
+        authors = defaultdict(list)
+        for author_id, count in Counter(
+            recipe.author_id for recipe in recipes
+        ).items():
+            authors[count].append(author_id)
+        for count, author_ids in authors.items():
+            increment(
+                User.objects.filter(pk__in=author_ids), 'recipes_count', count
+            )
@@ -0,0 +1,13 @@
+from pathlib import Path
+
+from recipes.cache import TAGS_NAMESPACE
+from recipes.loaders import LoadCommand
+from recipes.models import Tag
+
+
+class Command(LoadCommand):
+    help = 'Загружает теги из CSV (название,цвет,slug) или JSON.'
+    model = Tag
+    fields = ('name', None, 'slug')
+    default_path = Path(__file__).resolve().parent / 'tags.csv'
+    cache_namespaces = (TAGS_NAMESPACE,)
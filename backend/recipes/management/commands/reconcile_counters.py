@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.counters import COUNTERS, reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики рецептов, избранного, корзин и подписчиков '
+        'с таблицами связей и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести число расхождений, без исправления.',
+        )
+
+    def handle(self, *args, dry_run, **options):
+        total = 0
+        with transaction.atomic():
+            for counter in COUNTERS:
+                count = reconcile(counter, dry_run=dry_run)
+                self.stdout.write(f'{counter}: {count}')
+                total += count
+        if total and dry_run:
+            raise CommandError(f'Расхождений: {total}.')
+        self.stdout.write(f'Расхождений: {total}.')
+        if total and not dry_run:
+            self.stdout.write(self.style.SUCCESS('Счётчики исправлены.'))
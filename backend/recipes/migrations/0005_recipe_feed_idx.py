@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_alter_recipe_cooking_time_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-created_at', 'name', 'id'], name='recipe_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:08
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_FORWARDS = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    '''
+    CREATE OR REPLACE FUNCTION recipes_recipe_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+            || setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    '''
+    CREATE TRIGGER recipes_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, text, search_vector
+    ON recipes_recipe
+    FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector_update()
+    ''',
+    'UPDATE recipes_recipe SET name = name',
+    '''
+    CREATE INDEX recipe_search_vector_idx
+    ON recipes_recipe USING gin (search_vector)
+    ''',
+    '''
+    CREATE INDEX recipe_name_trgm_idx
+    ON recipes_recipe USING gin (name gin_trgm_ops)
+    ''',
+)
+
+SEARCH_BACKWARDS = (
+    'DROP INDEX IF EXISTS recipe_name_trgm_idx',
+    'DROP INDEX IF EXISTS recipe_search_vector_idx',
+    'DROP TRIGGER IF EXISTS recipes_recipe_search_vector_trigger '
+    'ON recipes_recipe',
+    'DROP FUNCTION IF EXISTS recipes_recipe_search_vector_update()',
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_feed_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            run_on_postgresql(SEARCH_FORWARDS),
+            run_on_postgresql(SEARCH_BACKWARDS),
+        ),
+    ]
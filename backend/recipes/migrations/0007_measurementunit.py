@@ -0,0 +1,47 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:18
+
+import django.core.validators
+from django.db import migrations, models
+
+UNITS = (
+    ('г', 'г', 1),
+    ('гр', 'г', 1),
+    ('кг', 'г', 1000),
+    ('мл', 'мл', 1),
+    ('л', 'мл', 1000),
+    ('шт.', 'шт.', 1),
+    ('шт', 'шт.', 1),
+)
+
+
+def create_units(apps, schema_editor):
+    MeasurementUnit = apps.get_model('recipes', 'MeasurementUnit')
+    MeasurementUnit.objects.bulk_create(
+        MeasurementUnit(name=name, canonical=canonical, factor=factor)
+        for name, canonical, factor in UNITS
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeasurementUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True, verbose_name='Единица измерения')),
+                ('canonical', models.CharField(max_length=64, verbose_name='Каноническая единица')),
+                ('factor', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)], verbose_name='Множитель')),
+            ],
+            options={
+                'verbose_name': 'единица измерения',
+                'verbose_name_plural': 'Единицы измерения',
+                'ordering': ('canonical', 'factor'),
+            },
+        ),
+        migrations.RunPython(create_units, migrations.RunPython.noop),
+    ]
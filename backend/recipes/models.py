@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.utils.functional import cached_property
 
 from shortuuid.django_fields import ShortUUIDField
 
@@ -40,6 +42,37 @@ class Tag(models.Model):
         return self.name
 
 
+class MeasurementUnit(models.Model):
+    """Единица измерения и её перевод в каноническую.
+
+    ``amount * factor`` — количество в единице ``canonical``, например
+    кг → г с множителем 1000. Единицы без записи в таблице списка
+    покупок не пересчитываются.
+    """
+
+    name = models.CharField(
+        verbose_name='Единица измерения',
+        max_length=LENGTH_MEASUREMENT_UNIT,
+        unique=True,
+    )
+    canonical = models.CharField(
+        verbose_name='Каноническая единица',
+        max_length=LENGTH_MEASUREMENT_UNIT,
+    )
+    factor = models.PositiveIntegerField(
+        verbose_name='Множитель',
+        validators=[MinValueValidator(1)],
+    )
+
+    class Meta:
+        verbose_name = 'единица измерения'
+        verbose_name_plural = 'Единицы измерения'
+        ordering = ('canonical', 'factor')
+
+    def __str__(self):
+        return f'{self.name} = {self.factor} {self.canonical}'
+
+
 class Ingredient(models.Model):
     """Модель ингредиента."""
 
@@ -101,6 +134,17 @@ class Recipe(models.Model):
     )
     short_link = ShortUUIDField(length=10, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='В корзинах',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
 
     objects = RecipeQuerySet.as_manager()
 
@@ -108,6 +152,12 @@ class Recipe(models.Model):
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-created_at', 'name')
+        indexes = [
+            models.Index(
+                fields=('-created_at', 'name', 'id'),
+                name='recipe_feed_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -115,6 +165,17 @@ class Recipe(models.Model):
     def get_absolute_url(self):
         return f'/recipes/{self.pk}/'
 
+    @cached_property
+    def cart_user_ids(self):
+        """Id пользователей, у которых рецепт в корзине.
+
+        Читается один раз на правку рецепта: его используют и перенос
+        ингредиентов в списки покупок, и сброс их ETag после save().
+        """
+        return list(
+            self.user_to_shopping.order_by().values_list('user_id', flat=True)
+        )
+
 
 class RecipeIngredient(models.Model):
     """Промежуточная модель для связи рецепта и ингредиента."""
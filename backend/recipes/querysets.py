@@ -1,34 +1,134 @@
-from django.db import models
-from django.db.models import ExpressionWrapper, Q, Value
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db import connections, models
+from django.db.models import (
+    Exists,
+    F,
+    Func,
+    OuterRef,
+    Prefetch,
+    Q,
+    Value,
+    Window,
+)
+from django.db.models.functions import Greatest, RowNumber
+
+SEARCH_CONFIG = 'russian'
+
+
+class Casefold(Func):
+    """Строка без учёта регистра, в том числе для кириллицы.
+
+    LOWER и LIKE в SQLite меняют регистр только у ASCII, поэтому функция
+    CASEFOLD регистрируется на соединениях SQLite в recipes.signals.
+    """
+
+    function = 'CASEFOLD'
+    output_field = models.TextField()
 
 
 class RecipeQuerySet(models.QuerySet):
+    def with_related(self):
+        """Связанные данные, которые читает RecipeSerializer."""
+        from .models import RecipeIngredient
+
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_to_ingredient',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ).order_by('ingredient__name'),
+            ),
+        )
+
     def annotated_fields(self, user):
-        from .models import Recipe
+        from users.models import Favorite, Follow, ShoppingCart
 
+        queryset = self.with_related()
         if user.is_authenticated:
-            return (
-                self.select_related('author')
-                .prefetch_related('tags', 'ingredients')
-                .annotate(
-                    is_favorited=ExpressionWrapper(
-                        Q(
-                            id__in=Recipe.objects.filter(favorite=user).values(
-                                'id'
-                            )
-                        ),
-                        output_field=models.BooleanField(),
-                    ),
-                    is_in_shopping_cart=ExpressionWrapper(
-                        Q(
-                            id__in=Recipe.objects.filter(shopping=user).values(
-                                'id'
-                            )
-                        ),
-                        output_field=models.BooleanField(),
-                    ),
+            return queryset.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+                ),
+                is_in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )
+                ),
+                author_is_subscribed=Exists(
+                    Follow.objects.filter(
+                        user=user, author=OuterRef('author')
+                    )
+                ),
+            )
+        return queryset.annotate(
+            is_favorited=Value(False),
+            is_in_shopping_cart=Value(False),
+            author_is_subscribed=Value(False),
+        )
+
+    def latest_per_author(self, limit=None):
+        """Не больше ``limit`` последних рецептов каждого автора.
+
+        Рецепты нумеруются ROW_NUMBER() в порядке Meta.ordering отдельно
+        для каждого автора. Django 3.2 не умеет фильтровать по оконной
+        функции, поэтому ранжированный запрос оборачивается в raw().
+        """
+        ranked = self.annotate(
+            recipe_rank=Window(
+                RowNumber(),
+                partition_by=F('author_id'),
+                order_by=[
+                    F(name[1:]).desc() if name.startswith('-')
+                    else F(name).asc()
+                    for name in self.model._meta.ordering
+                ],
+            )
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        where = ''
+        if limit is not None:
+            where = 'WHERE recipe_rank <= %s'
+            params = (*params, limit)
+        return self.model.objects.raw(
+            f'SELECT * FROM ({sql}) AS ranked {where} '
+            'ORDER BY author_id, recipe_rank',
+            params,
+        )
+
+    def search(self, text):
+        """Полнотекстовый поиск по названию и описанию рецепта.
+
+        В PostgreSQL ищет по ``search_vector`` (русская морфология) и по
+        триграммному сходству названия, чтобы находить рецепты с опечатками.
+        На других СУБД сводится к поиску подстроки без учёта регистра.
+        """
+        vendor = connections[self.db].vendor
+        if vendor == 'sqlite':
+            text = text.casefold()
+            return self.alias(
+                name_folded=Casefold('name'), text_folded=Casefold('text')
+            ).filter(
+                Q(name_folded__contains=text) | Q(text_folded__contains=text)
+            )
+        if vendor != 'postgresql':
+            return self.filter(
+                Q(name__icontains=text) | Q(text__icontains=text)
+            )
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return (
+            self.annotate(
+                search_rank=Greatest(
+                    SearchRank(F('search_vector'), query),
+                    TrigramSimilarity('name', text),
                 )
             )
-        return self.annotate(
-            is_favorited=Value(False), is_in_shopping_cart=Value(False)
+            .filter(Q(search_vector=query) | Q(name__trigram_similar=text))
+            .order_by('-search_rank', *self.model._meta.ordering)
         )
@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from foodgram_backend.constants import (
+    SHORT_LINK_LENGTH,
+    SHORT_LINK_LOCAL_TIMEOUT,
+    SHORT_LINK_LRU_SIZE,
+    SHORT_LINK_NEGATIVE_TIMEOUT,
+)
+
+from .models import Recipe
+
+# Значение в кешах для несуществующей ссылки.
+MISSING = 0
+
+
+class LRUCache:
+    """Потокобезопасный словарь, вытесняющий давно не читанные ключи."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.data.get(key)
+            if value is not None:
+                self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+local_cache = LRUCache(SHORT_LINK_LRU_SIZE)
+link_cache = LRUCache(SHORT_LINK_LRU_SIZE)
+
+
+def _cache_key(short_link):
+    return f'short-link:{short_link}'
+
+
+def _link_cache_key(recipe_id):
+    return f'short-link-url:{recipe_id}'
+
+
+def resolve(short_link):
+    """id рецепта по короткой ссылке или None.
+
+    Ссылки не меняются, поэтому найденные id хранятся в общем кеше
+    Django (memcached) бессрочно, а в LRU процесса — SHORT_LINK_LOCAL_TIMEOUT
+    секунд: удаление рецепта в другом процессе сбрасывает только общий кеш.
+    Отсутствие ссылки кешируется на SHORT_LINK_NEGATIVE_TIMEOUT секунд.
+    """
+    if len(short_link) > SHORT_LINK_LENGTH or not short_link.isalnum():
+        return None
+    entry = local_cache.get(short_link)
+    now = time.monotonic()
+    if entry is not None and entry[1] > now:
+        return entry[0] or None
+    key = _cache_key(short_link)
+    recipe_id = cache.get(key)
+    if recipe_id is None:
+        recipe_id = (
+            Recipe.objects.filter(short_link=short_link)
+            .values_list('pk', flat=True)
+            .first()
+        ) or MISSING
+        cache.set(
+            key, recipe_id, None if recipe_id else SHORT_LINK_NEGATIVE_TIMEOUT
+        )
+    local_cache.set(
+        short_link,
+        (
+            recipe_id,
+            now
+            + (
+                SHORT_LINK_LOCAL_TIMEOUT
+                if recipe_id
+                else SHORT_LINK_NEGATIVE_TIMEOUT
+            ),
+        ),
+    )
+    return recipe_id or None
+
+
+def short_url(recipe_id):
+    """Полная короткая ссылка ``HOST_NAME/s/<short_link>/`` или None.
+
+    Кешируется так же, как resolve(), но без отрицательных записей:
+    отсутствующий рецепт — редкий случай для этого эндпоинта. Ключ LRU —
+    int, как ``instance.pk`` в forget().
+    """
+    recipe_id = int(recipe_id)
+    entry = link_cache.get(recipe_id)
+    now = time.monotonic()
+    if entry is not None and entry[1] > now:
+        return entry[0]
+    key = _link_cache_key(recipe_id)
+    link = cache.get(key)
+    if link is None:
+        short_link = (
+            Recipe.objects.filter(pk=recipe_id)
+            .values_list('short_link', flat=True)
+            .first()
+        )
+        if short_link is None:
+            return None
+        link = f'{settings.HOST_NAME}/s/{short_link}/'
+        cache.set(key, link, None)
+    link_cache.set(recipe_id, (link, now + SHORT_LINK_LOCAL_TIMEOUT))
+    return link
+
+
+def forget(short_link, recipe_id=None):
+    """Сбрасывает ссылку в кешах (рецепт создан или удалён)."""
+    local_cache.pop(short_link)
+    keys = [_cache_key(short_link)]
+    if recipe_id is not None:
+        link_cache.pop(int(recipe_id))
+        keys.append(_link_cache_key(int(recipe_id)))
+    cache.delete_many(keys)
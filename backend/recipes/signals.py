@@ -0,0 +1,219 @@
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from users.models import ShoppingCart, ShoppingListItem
+
+from .cache import (
+    INGREDIENTS_NAMESPACE,
+    RECIPES_NAMESPACE,
+    TAGS_NAMESPACE,
+    bump_cache_version,
+    bump_cache_versions,
+    cart_namespace,
+)
+from .counters import increment
+from .models import (
+    Ingredient,
+    MeasurementUnit,
+    Recipe,
+    Tag,
+)
+from .short_links import forget
+from .tasks import generate_image_variants
+
+User = get_user_model()
+
+
+def casefold(value):
+    return None if value is None else value.casefold()
+
+
+@receiver(connection_created)
+def register_casefold(connection, **kwargs):
+    """CASEFOLD для поиска рецептов в SQLite, см. RecipeQuerySet.search."""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            'CASEFOLD', 1, casefold, deterministic=True
+        )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_recipes_cache(**kwargs):
+    """Сбрасывает кеш ленты рецептов для анонимных пользователей.
+
+    Теги и ингредиенты рецепта меняются вместе с ним: API и админка
+    сохраняют сам рецепт, поэтому на строки связей приёмников нет и
+    Django удаляет их без выборки.
+    """
+    bump_cache_version(RECIPES_NAMESPACE)
+
+
+@receiver(post_save, sender=User)
+def invalidate_recipes_cache_on_profile(
+    created, update_fields=None, **kwargs
+):
+    """Профиль автора входит в ленту, вход в систему — нет.
+
+    У нового пользователя рецептов нет, регистрация ленту не меняет.
+    """
+    if created or update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_cache_version(RECIPES_NAMESPACE)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=MeasurementUnit)
+@receiver(post_delete, sender=MeasurementUnit)
+def invalidate_ingredients(**kwargs):
+    """Сбрасывает индекс автодополнения и ETag списков ингредиентов.
+
+    Единицы измерения входят в справочник: от них зависят списки покупок.
+    """
+    bump_cache_version(INGREDIENTS_NAMESPACE)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(**kwargs):
+    """Сбрасывает ETag списка тегов."""
+    bump_cache_version(TAGS_NAMESPACE)
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_cart(instance, **kwargs):
+    """Сбрасывает ETag списка покупок владельца корзины."""
+    bump_cache_version(cart_namespace(instance.user_id))
+
+
+@receiver(m2m_changed, sender=ShoppingCart)
+def invalidate_cart_relation(instance, action, reverse, pk_set, **kwargs):
+    """То же для add/remove/clear через User.shopping_cart."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_cache_version(cart_namespace(instance.pk))
+    elif pk_set:
+        bump_cache_versions(cart_namespace(user_id) for user_id in pk_set)
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_carts_with_recipe(instance, created, **kwargs):
+    """Изменение рецепта меняет списки покупок всех, у кого он в корзине."""
+    if not created:
+        bump_cache_versions(
+            cart_namespace(user_id) for user_id in instance.cart_user_ids
+        )
+    # Следующая правка того же объекта прочитает корзины заново.
+    instance.__dict__.pop('cart_user_ids', None)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(instance, created, **kwargs):
+    """Добавляет ингредиенты рецепта в список покупок."""
+    if created:
+        ShoppingListItem.objects.add_recipes(
+            ((instance.user_id, instance.recipe_id),)
+        )
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(instance, **kwargs):
+    """Вычитает ингредиенты рецепта из списка покупок.
+
+    Срабатывает и при remove()/clear(), и при каскадном удалении рецепта:
+    до удаления его ингредиенты ещё на месте.
+    """
+    ShoppingListItem.objects.add_recipes(
+        ((instance.user_id, instance.recipe_id),), sign=-1
+    )
+
+
+@receiver(m2m_changed, sender=ShoppingCart)
+def add_relation_to_shopping_list(instance, action, reverse, pk_set, **kwargs):
+    """add() через User.shopping_cart сохраняет строки bulk_create."""
+    if action != 'post_add' or not pk_set:
+        return
+    ShoppingListItem.objects.add_recipes(
+        (pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set
+    )
+
+
+def file_name(instance, field):
+    """Имя файла в поле; отложенное поле не загружается из БД."""
+    value = instance.__dict__.get(field)
+    return getattr(value, 'name', value) or None
+
+
+@receiver(post_init, sender=Recipe)
+@receiver(post_init, sender=User)
+def remember_image_names(instance, **kwargs):
+    """Запоминает имена картинок, чтобы после save() заметить замену."""
+    instance._image_names = {
+        field: file_name(instance, field)
+        for field in ('image', 'avatar')
+        if field in instance.__dict__
+    }
+
+
+def image_changed(instance, field, created, update_fields):
+    """Новое имя файла, если при сохранении картинка сменилась."""
+    if update_fields and field not in update_fields:
+        return None
+    name = file_name(instance, field)
+    changed = created or name != instance._image_names.get(field)
+    instance._image_names[field] = name
+    return name if changed else None
+
+
+@receiver(post_save, sender=Recipe)
+def generate_recipe_image_variants(
+    instance, created, update_fields, **kwargs
+):
+    """Ставит в очередь уменьшенные копии нового фото рецепта."""
+    name = image_changed(instance, 'image', created, update_fields)
+    if name:
+        generate_image_variants.delay(name=name, kind='recipe')
+
+
+@receiver(post_save, sender=User)
+def generate_avatar_variants(instance, created, update_fields, **kwargs):
+    """То же для аватара: смена пароля или входа задачу не ставит."""
+    name = image_changed(instance, 'avatar', created, update_fields)
+    if name:
+        generate_image_variants.delay(name=name, kind='avatar')
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def forget_short_link(instance, created=True, **kwargs):
+    """Сбрасывает кеш ссылки, в том числе «ссылки нет» до создания."""
+    if created:
+        forget(instance.short_link, instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def count_author_recipes(instance, created=None, **kwargs):
+    """Счётчик рецептов автора: +1 при создании, −1 при удалении."""
+    if created is False:
+        return
+    increment(
+        User.objects.filter(pk=instance.author_id),
+        'recipes_count',
+        1 if created else -1,
+    )
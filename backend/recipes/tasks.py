@@ -0,0 +1,18 @@
+from foodgram_backend.constants import (
+    AVATAR_IMAGE_VARIANTS,
+    RECIPE_IMAGE_VARIANTS,
+)
+from jobs.registry import task
+
+from .images import generate_variants
+
+IMAGE_VARIANTS = {
+    'recipe': RECIPE_IMAGE_VARIANTS,
+    'avatar': AVATAR_IMAGE_VARIANTS,
+}
+
+
+@task
+def generate_image_variants(name, kind):
+    """Уменьшенные копии фото рецепта или аватара."""
+    generate_variants(name, IMAGE_VARIANTS[kind])
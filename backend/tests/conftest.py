@@ -0,0 +1,174 @@
+import base64
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.images import ready_variants
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.short_links import link_cache, local_cache
+from users.models import (
+    Favorite,
+    Follow,
+    FoodgramUser,
+    ShoppingCart,
+    ShoppingListItem,
+)
+
+PASSWORD = 'Пароль-для-тестов'
+USERS = 10
+RECIPES = 40
+INGREDIENTS_PER_RECIPE = 8
+
+
+def make_image():
+    """PNG 1×1 в base64, как его присылает фронтенд."""
+    image = BytesIO()
+    Image.new('RGB', (1, 1)).save(image, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        image.getvalue()
+    ).decode()
+
+
+def bulk_create(model, objects):
+    """bulk_create, после которого у объектов есть pk.
+
+    Django 3.2 не возвращает pk из bulk_create в SQLite, поэтому строки
+    перечитываются: таблицы в начале теста пусты.
+    """
+    objects = model.objects.bulk_create(objects)
+    if objects and objects[0].pk is None:
+        objects = list(model.objects.order_by('pk'))
+    return objects
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    """Кеш и LRU процесса не переживают тест: id в SQLite повторяются."""
+    cache.clear()
+    local_cache.clear()
+    link_cache.clear()
+    ready_variants.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def data(db):
+    """Пользователи, теги, ингредиенты и рецепты с избранным и корзиной.
+
+    ``user`` подписан на всех, кроме ``stranger``; ``recipe`` у него в
+    избранном и в корзине, ``other_recipe`` — нигде.
+    """
+    users = bulk_create(
+        FoodgramUser,
+        (
+            FoodgramUser(
+                email=f'user{index}@example.com',
+                username=f'user{index}',
+                first_name='Имя',
+                last_name=str(index),
+                password=make_password(PASSWORD),
+            )
+            for index in range(USERS)
+        ),
+    )
+    tags = bulk_create(
+        Tag,
+        (Tag(name=f'Тег {index}', slug=f'tag-{index}') for index in range(3)),
+    )
+    ingredients = bulk_create(
+        Ingredient,
+        (
+            Ingredient(name=f'Ингредиент {index}', measurement_unit='г')
+            for index in range(INGREDIENTS_PER_RECIPE * 4)
+        ),
+    )
+    recipes = bulk_create(
+        Recipe,
+        (
+            Recipe(
+                author=users[index % USERS],
+                name=f'Рецепт {index}',
+                text='Описание рецепта',
+                image='recipes/images/test.png',
+                cooking_time=index % 60 + 1,
+            )
+            for index in range(RECIPES)
+        ),
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient=ingredients[(index + offset) % len(ingredients)],
+            amount=offset + 1,
+        )
+        for index, recipe in enumerate(recipes)
+        for offset in range(INGREDIENTS_PER_RECIPE)
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe=recipe, tag=tags[index % len(tags)])
+        for index, recipe in enumerate(recipes)
+    )
+    user, stranger = users[0], users[-1]
+    user.avatar = 'users/test.png'
+    user.save(update_fields=('avatar',))
+    Follow.objects.bulk_create(
+        Follow(user=user, author=author) for author in users[1:-1]
+    )
+    Favorite.objects.bulk_create(
+        Favorite(user=user, recipe=recipe) for recipe in recipes[:-1:2]
+    )
+    ShoppingCart.objects.bulk_create(
+        ShoppingCart(user=user, recipe=recipe) for recipe in recipes[:10]
+    )
+    ShoppingListItem.objects.rebuild([user.id])
+    return SimpleNamespace(
+        user=user,
+        author=users[1],
+        stranger=stranger,
+        users=users,
+        tags=tags,
+        ingredients=ingredients,
+        recipes=recipes,
+        recipe=recipes[0],
+        other_recipe=recipes[-1],
+        password=PASSWORD,
+        image=make_image(),
+        # Тело POST/PATCH: два тега, четыре ингредиента, из них два —
+        # как у ``recipe``, с другим количеством.
+        payload={
+            'name': 'Новый рецепт',
+            'text': 'Описание рецепта',
+            'cooking_time': 10,
+            'image': make_image(),
+            'tags': [tag.id for tag in tags[:2]],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': index + 10}
+                for index, ingredient in enumerate(ingredients[6:10])
+            ],
+        },
+    )
+
+
+@pytest.fixture
+def anonymous_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(data):
+    client = APIClient()
+    token = Token.objects.create(user=data.user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def clients(anonymous_client, user_client):
+    return {'anonymous': anonymous_client, 'authenticated': user_client}
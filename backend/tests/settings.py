@@ -0,0 +1,24 @@
+import tempfile
+
+from foodgram_backend.settings import *  # noqa: F401, F403
+from foodgram_backend.settings import os
+
+# Без DB_HOST тесты идут на SQLite в памяти. С DB_HOST (в контейнере)
+# pytest-django создаёт отдельную БД test_<POSTGRES_DB>, рабочая не
+# затрагивается.
+if not os.getenv('DB_HOST'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+    }
+
+# Тесты идут в одном процессе, а кеш в памяти, как и memcached, не
+# добавляет запросов к БД.
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+}
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-tests-')
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+ALLOWED_HOSTS = ['testserver', 'localhost']
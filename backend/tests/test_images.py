@@ -0,0 +1,93 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+
+from api import utils
+from api.utils import Base64ImageField
+
+
+def png(size=(8, 8)):
+    image = BytesIO()
+    Image.new('RGB', size, 'red').save(image, 'PNG')
+    return image.getvalue()
+
+
+def data_uri(content, line_length=None):
+    encoded = base64.b64encode(content).decode()
+    if line_length:
+        encoded = '\r\n'.join(
+            encoded[offset:offset + line_length]
+            for offset in range(0, len(encoded), line_length)
+        )
+    return f'data:image/png;base64,{encoded}\n'
+
+
+def error_code(data):
+    with pytest.raises(ValidationError) as error:
+        Base64ImageField().run_validation(data)
+    return error.value.detail[0].code
+
+
+@pytest.mark.parametrize('chunk_size', (5, 64 * 1024))
+@pytest.mark.parametrize('line_length', (None, 76, 3))
+def test_decodes_base64_with_line_breaks(
+    monkeypatch, chunk_size, line_length
+):
+    """Пробелы и переносы строк не мешают, где бы ни прошла граница куска."""
+    monkeypatch.setattr(utils, 'BASE64_CHUNK_SIZE', chunk_size)
+    content = png()
+    file = Base64ImageField().to_internal_value(
+        data_uri(content, line_length)
+    )
+    file.seek(0)
+    assert file.read() == content
+
+
+@pytest.mark.parametrize(
+    'data',
+    (
+        'data:image/png,iVBORw0KGgo=',
+        'data:image/png;base64,@@@@',
+        'data:image/png;base64,iVBORw0KGgoAA',
+    ),
+    ids=('no-base64-marker', 'bad-alphabet', 'truncated'),
+)
+def test_rejects_malformed_base64(data):
+    assert error_code(data) == 'invalid_base64'
+
+
+def test_size_limit(settings):
+    content = png()
+    settings.MAX_IMAGE_UPLOAD_SIZE = len(content) - 1
+    assert error_code(data_uri(content, 76)) == 'too_large'
+    assert error_code(SimpleUploadedFile('a.png', content)) == 'too_large'
+    settings.MAX_IMAGE_UPLOAD_SIZE = len(content)
+    assert Base64ImageField().to_internal_value(data_uri(content, 76))
+
+
+def test_pixel_limit(settings):
+    settings.MAX_IMAGE_PIXELS = 63
+    assert error_code(data_uri(png((8, 8)))) == 'too_many_pixels'
+    assert error_code(
+        SimpleUploadedFile('a.png', png((8, 8)))
+    ) == 'too_many_pixels'
+    settings.MAX_IMAGE_PIXELS = 64
+    assert Base64ImageField().to_internal_value(data_uri(png((8, 8))))
+
+
+@pytest.mark.parametrize(
+    'content, code',
+    ((png(), 'too_many_pixels'), (b'not an image', 'invalid_image')),
+)
+def test_avatar_errors_reach_the_client(settings, user_client, content, code):
+    settings.MAX_IMAGE_PIXELS = 63
+    response = user_client.put(
+        reverse('user-avatar'), {'avatar': data_uri(content)}, format='json'
+    )
+    assert response.status_code == 400
+    assert response.data['avatar'][0].code == code
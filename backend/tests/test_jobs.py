@@ -0,0 +1,98 @@
+import threading
+from datetime import timedelta
+
+from django.db import OperationalError
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.worker import Worker
+
+TIMEOUT = timedelta(minutes=5)
+
+
+def test_claim_fails_stale_jobs_without_attempts_left(db):
+    started_at = timezone.now() - TIMEOUT * 2
+    retried, exhausted = (
+        Job.objects.create(
+            task='noop',
+            status=Job.Status.RUNNING,
+            started_at=started_at,
+            attempts=attempts,
+            max_attempts=3,
+        )
+        for attempts in (2, 3)
+    )
+    assert Job.objects.claim('worker', 10, TIMEOUT) == [retried]
+    retried.refresh_from_db()
+    exhausted.refresh_from_db()
+    assert (retried.status, retried.attempts) == (Job.Status.RUNNING, 3)
+    assert exhausted.status == Job.Status.FAILED
+    assert exhausted.attempts == 3
+
+
+def test_worker_claims_as_threads_free_up(monkeypatch, db):
+    """Долгая задача не мешает забрать следующие в освободившийся поток."""
+    jobs = Job.objects.bulk_create(Job(task='noop') for _ in range(4))
+    if jobs[0].pk is None:
+        jobs = list(Job.objects.order_by('pk'))
+    executed = []
+    waited = []
+    last_started = threading.Event()
+
+    def execute(self, job):
+        executed.append(job.pk)
+        if job.pk == jobs[0].pk:
+            waited.append(last_started.wait(timeout=2))
+        elif job.pk == jobs[-1].pk:
+            last_started.set()
+
+    monkeypatch.setattr(Worker, 'execute', execute)
+    Worker(threads=2, poll_interval=0.01, timeout=TIMEOUT).run(once=True)
+    assert waited == [True]
+    assert sorted(executed) == [job.pk for job in jobs]
+
+
+def test_image_variants_are_queued_only_for_new_images(user_client, data):
+    Job.objects.all().delete()
+    recipe_url = reverse('recipes-detail', args=(data.recipe.id,))
+    fields = {
+        key: data.payload[key] for key in ('name', 'tags', 'ingredients')
+    }
+    response = user_client.patch(recipe_url, fields, format='json')
+    assert response.status_code == 200, response.data
+    user_client.post(
+        reverse('user-set-password'),
+        {'current_password': data.password, 'new_password': 'Новый-пароль'},
+        format='json',
+    )
+    assert not Job.objects.exists()
+    response = user_client.patch(
+        recipe_url, {**fields, 'image': data.image}, format='json'
+    )
+    assert response.status_code == 200, response.data
+    user_client.put(
+        reverse('user-avatar'), {'avatar': data.image}, format='json'
+    )
+    assert sorted(
+        job.payload['kind'] for job in Job.objects.all()
+    ) == ['avatar', 'recipe']
+
+
+def test_worker_survives_database_errors(monkeypatch, transactional_db):
+    Job.objects.create(task='noop')
+    claim = Job.objects.claim
+    failures = [OperationalError('server closed the connection')]
+
+    def flaky_claim(*args):
+        if failures:
+            raise failures.pop()
+        return claim(*args)
+
+    monkeypatch.setattr(Job.objects, 'claim', flaky_claim)
+    executed = []
+    monkeypatch.setattr(
+        Worker, 'execute', lambda self, job: executed.append(job.pk)
+    )
+    Worker(threads=2, poll_interval=0.01, timeout=TIMEOUT).run(once=True)
+    assert len(executed) == 1
@@ -0,0 +1,79 @@
+from django.urls import reverse
+
+from api.mixins import PostDestroyMixin
+from recipes.counters import COUNTERS, reconcile
+from users.models import ShoppingCart, ShoppingListItem
+
+
+def shopping_list(user):
+    return {
+        (row['ingredient_id'], row['total_amount'])
+        for row in ShoppingListItem.objects.filter(user=user).values(
+            'ingredient_id', 'total_amount'
+        )
+    }
+
+
+def live_shopping_list(user):
+    return {
+        (row['ingredient_id'], row['total_amount'])
+        for row in ShoppingListItem.objects.live([user.id]).values(
+            'ingredient_id', 'total_amount'
+        )
+    }
+
+
+def test_bulk_add_skips_rows_inserted_concurrently(
+    monkeypatch, user_client, data
+):
+    """Связь, вставленная параллельно между чтением и INSERT, не считается.
+
+    Счётчик in_carts_count и список покупок меняются только для строк,
+    которые вставил сам запрос.
+    """
+    for counter in COUNTERS:
+        reconcile(counter)
+    racing, fresh = data.recipes[-3], data.recipes[-5]
+    insert_links = PostDestroyMixin.insert_links
+
+    def insert_after_concurrent_request(self, related_manager, target_ids):
+        ShoppingCart.objects.create(user=data.user, recipe=racing)
+        return insert_links(self, related_manager, target_ids)
+
+    monkeypatch.setattr(
+        PostDestroyMixin, 'insert_links', insert_after_concurrent_request
+    )
+    response = user_client.post(
+        reverse('recipes-bulk-shopping-cart'),
+        {'ids': [racing.id, fresh.id]},
+        format='json',
+    )
+    assert response.status_code == 200
+    assert response.data['results'] == [
+        {'id': racing.id, 'status': 'exists'},
+        {'id': fresh.id, 'status': 'created'},
+    ]
+    # «Параллельная» строка создана через ORM: список покупок учёл её
+    # сигналом, счётчик — нет. Повторно её не учёл и массовый запрос.
+    racing.refresh_from_db()
+    fresh.refresh_from_db()
+    assert (racing.in_carts_count, fresh.in_carts_count) == (0, 1)
+    ShoppingCart.objects.filter(user=data.user, recipe=racing).delete()
+    assert shopping_list(data.user) == live_shopping_list(data.user)
+
+
+def test_bulk_add_reports_statuses(user_client, data):
+    for counter in COUNTERS:
+        reconcile(counter)
+    response = user_client.post(
+        reverse('recipes-bulk-favorite'),
+        {'ids': [data.recipe.id, data.other_recipe.id, 10 ** 9]},
+        format='json',
+    )
+    assert response.status_code == 200
+    assert [item['status'] for item in response.data['results']] == [
+        'exists',
+        'created',
+        'not_found',
+    ]
+    assert reconcile('favorites_count', dry_run=True) == 0
@@ -0,0 +1,59 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from recipes.loaders import iter_json_array
+from recipes.models import Ingredient, Tag
+
+ROWS = [
+    {'name': f'Ингредиент {index}', 'measurement_unit': 'г'}
+    for index in range(50)
+]
+
+
+@pytest.mark.parametrize('chunk_size', (1, 7, 1024))
+def test_json_array_is_read_in_chunks(chunk_size):
+    text = json.dumps([*ROWS, 12345, None], ensure_ascii=False, indent=2)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == [
+        *ROWS,
+        12345,
+        None,
+    ]
+
+
+@pytest.mark.parametrize('text', ('', '{}', '[1,]', '[1 2]', '[1'))
+def test_malformed_json_array(text):
+    with pytest.raises(CommandError):
+        list(iter_json_array(io.StringIO(text), 1))
+
+
+def test_load_commands_use_bundled_files(db):
+    call_command('load_tags', stdout=io.StringIO(), stderr=io.StringIO())
+    call_command(
+        'load_ingredients', stdout=io.StringIO(), stderr=io.StringIO()
+    )
+    assert Tag.objects.count() == 3
+    assert Ingredient.objects.count() > 0
+
+
+@pytest.mark.parametrize('suffix', ('.json', '.ndjson'))
+def test_load_ingredients_from_json(suffix, tmp_path, db):
+    path = tmp_path / f'ingredients{suffix}'
+    if suffix == '.json':
+        path.write_text(json.dumps(ROWS), encoding='utf-8')
+    else:
+        path.write_text(
+            ''.join(json.dumps(row) + '\n' for row in ROWS), encoding='utf-8'
+        )
+    for _ in range(2):
+        call_command(
+            'load_ingredients',
+            str(path),
+            '--batch-size=7',
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+        )
+    assert Ingredient.objects.count() == len(ROWS)
@@ -0,0 +1,261 @@
+"""Число SQL-запросов каждого эндпоинта не превышает QUERY_BUDGETS.
+
+Бюджет включает аутентификацию по токену. Кеш анонимных ответов пуст,
+поэтому считается и запрос, который его заполняет.
+"""
+from collections import namedtuple
+
+import pytest
+from django.urls import reverse
+
+from foodgram_backend.constants import QUERY_BUDGETS
+
+LIMIT = 20
+
+# Эндпоинт (ключ QUERY_BUDGETS), URL и тело запроса (функции от фикстуры
+# data), доступность анониму, метод и ожидаемый статус ответа.
+Route = namedtuple(
+    'Route',
+    ('view', 'url', 'data', 'anonymous', 'method', 'status'),
+    defaults=(None, True, 'get', 200),
+)
+
+ROUTES = [
+    Route(
+        'RecipeViewSet.list',
+        lambda data: f'{reverse("recipes-list")}?limit={LIMIT}',
+    ),
+    Route(
+        'RecipeViewSet.retrieve',
+        lambda data: reverse('recipes-detail', args=(data.recipe.id,)),
+    ),
+    Route(
+        'RecipeViewSet.get_link',
+        lambda data: reverse('recipes-get-link', args=(data.recipe.id,)),
+    ),
+    Route(
+        'RecipeViewSet.destroy',
+        lambda data: reverse('recipes-detail', args=(data.recipe.id,)),
+        anonymous=False,
+        method='delete',
+        status=204,
+    ),
+    Route(
+        'RecipeViewSet.create',
+        lambda data: reverse('recipes-list'),
+        lambda data: data.payload,
+        anonymous=False,
+        method='post',
+        status=201,
+    ),
+    Route(
+        'RecipeViewSet.partial_update',
+        lambda data: reverse('recipes-detail', args=(data.recipe.id,)),
+        lambda data: {
+            key: data.payload[key] for key in ('name', 'tags', 'ingredients')
+        },
+        anonymous=False,
+        method='patch',
+    ),
+    Route(
+        'RecipeViewSet.bulk_favorite',
+        lambda data: reverse('recipes-bulk-favorite'),
+        lambda data: {'ids': [recipe.id for recipe in data.recipes[:LIMIT]]},
+        anonymous=False,
+        method='post',
+    ),
+    Route(
+        'RecipeViewSet.bulk_shopping_cart',
+        lambda data: reverse('recipes-bulk-shopping-cart'),
+        lambda data: {'ids': [recipe.id for recipe in data.recipes[:LIMIT]]},
+        anonymous=False,
+        method='post',
+    ),
+    Route(
+        'RecipeViewSet.download_shopping_cart',
+        lambda data: reverse('recipes-download-shopping-cart'),
+        anonymous=False,
+    ),
+    Route(
+        'FoodgramUserViewSet.list',
+        lambda data: f'{reverse("user-list")}?limit={LIMIT}',
+    ),
+    Route(
+        'FoodgramUserViewSet.retrieve',
+        lambda data: reverse('user-detail', args=(data.author.id,)),
+    ),
+    Route(
+        'FoodgramUserViewSet.create',
+        lambda data: reverse('user-list'),
+        lambda data: {
+            'email': 'new@example.com',
+            'username': 'new-user',
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+            'password': data.password,
+        },
+        method='post',
+        status=201,
+    ),
+    Route(
+        'FoodgramUserViewSet.me',
+        lambda data: reverse('user-me'),
+        anonymous=False,
+    ),
+    Route(
+        'FoodgramUserViewSet.set_password',
+        lambda data: reverse('user-set-password'),
+        lambda data: {
+            'current_password': data.password,
+            'new_password': data.password + '-2',
+        },
+        anonymous=False,
+        method='post',
+        status=204,
+    ),
+    Route(
+        'FoodgramUserViewSet.avatar',
+        lambda data: reverse('user-avatar'),
+        lambda data: {'avatar': data.image},
+        anonymous=False,
+        method='put',
+    ),
+    Route(
+        'FoodgramUserViewSet.delete_avatar',
+        lambda data: reverse('user-avatar'),
+        anonymous=False,
+        method='delete',
+        status=204,
+    ),
+    Route(
+        'FoodgramUserViewSet.subscriptions',
+        lambda data: (
+            f'{reverse("user-subscriptions")}?limit={LIMIT}&recipes_limit=3'
+        ),
+        anonymous=False,
+    ),
+    Route(
+        'FoodgramUserViewSet.bulk_subscribe',
+        lambda data: reverse('user-bulk-subscribe'),
+        lambda data: {'ids': [user.id for user in data.users]},
+        anonymous=False,
+        method='post',
+    ),
+    Route(
+        'TokenCreateView.post',
+        lambda data: reverse('login'),
+        lambda data: {'email': data.user.email, 'password': data.password},
+        method='post',
+    ),
+    Route(
+        'TokenDestroyView.post',
+        lambda data: reverse('logout'),
+        anonymous=False,
+        method='post',
+        status=204,
+    ),
+    Route('TagViewSet.list', lambda data: reverse('tag-list')),
+    Route(
+        'TagViewSet.retrieve',
+        lambda data: reverse('tag-detail', args=(data.tags[0].id,)),
+    ),
+    Route(
+        'IngredientViewSet.list',
+        lambda data: f'{reverse("ingredient-list")}?name=Ин',
+    ),
+    Route(
+        'IngredientViewSet.retrieve',
+        lambda data: reverse(
+            'ingredient-detail', args=(data.ingredients[0].id,)
+        ),
+    ),
+]
+
+
+def link_routes(view, url_name, linked, unlinked):
+    """Удаление и добавление связи: успех, повтор и несуществующий объект.
+
+    ``linked`` и ``unlinked`` возвращают id объекта, который уже связан с
+    пользователем, и id ещё не связанного.
+    """
+    delete_view = view.replace('.', '.delete_')
+
+    def url(get_id):
+        return lambda data: reverse(url_name, kwargs={'id': get_id(data)})
+
+    missing = url(lambda data: 0)
+    return [
+        Route(delete_view, url(linked), None, False, 'delete', 204),
+        Route(delete_view, url(unlinked), None, False, 'delete', 400),
+        Route(delete_view, missing, None, False, 'delete', 404),
+        Route(view, url(unlinked), None, False, 'post', 201),
+        Route(view, url(linked), None, False, 'post', 400),
+        Route(view, missing, None, False, 'post', 404),
+    ]
+
+
+ROUTES += [
+    *link_routes(
+        'RecipeViewSet.favorite',
+        'recipes-favorite',
+        lambda data: data.recipe.id,
+        lambda data: data.other_recipe.id,
+    ),
+    *link_routes(
+        'RecipeViewSet.shopping_cart',
+        'recipes-shopping-cart',
+        lambda data: data.recipe.id,
+        lambda data: data.other_recipe.id,
+    ),
+    *link_routes(
+        'FoodgramUserViewSet.subscribe',
+        'user-subscribe',
+        lambda data: data.author.id,
+        lambda data: data.stranger.id,
+    ),
+    Route(
+        'FoodgramUserViewSet.subscribe',
+        lambda data: reverse('user-subscribe', kwargs={'id': data.user.id}),
+        anonymous=False,
+        method='post',
+        status=400,
+    ),
+]
+
+
+def route_params(routes):
+    return [
+        pytest.param(
+            route,
+            client_name,
+            id=f'{route.view}-{route.status}-{client_name}',
+        )
+        for route in routes
+        for client_name in ('anonymous', 'authenticated')
+        if client_name == 'authenticated' or route.anonymous
+    ]
+
+
+def request(client, route, data):
+    """Выполняет запрос маршрута и дочитывает потоковый ответ."""
+    method = getattr(client, route.method)
+    if route.data is None:
+        response = method(route.url(data))
+    else:
+        response = method(route.url(data), route.data(data), format='json')
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def test_every_budget_is_checked():
+    assert {route.view for route in ROUTES} == QUERY_BUDGETS.keys()
+
+
+@pytest.mark.parametrize('route, client_name', route_params(ROUTES))
+def test_query_budget(
+    route, client_name, clients, data, django_assert_max_num_queries
+):
+    with django_assert_max_num_queries(QUERY_BUDGETS[route.view]):
+        response = request(clients[client_name], route, data)
+    assert response.status_code == route.status, response.content
@@ -0,0 +1,286 @@
+import base64
+import csv
+import io
+import json
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from api.services import SHOPPING_LIST_CSV_HEADER
+from foodgram_backend.constants import (
+    SHORT_LINK_NEGATIVE_TIMEOUT,
+    SHORT_LINK_REDIRECT_MAX_AGE,
+)
+from recipes import signals
+from recipes.cache import RECIPES_NAMESPACE
+from recipes.models import Recipe, RecipeIngredient
+from recipes.tasks import generate_image_variants
+
+
+@pytest.mark.parametrize('client_name', ('anonymous', 'authenticated'))
+def test_list_queries_do_not_depend_on_page_size(client_name, clients, data):
+    """Теги, ингредиенты и автор загружаются prefetch, а не на рецепт."""
+    counts = []
+    for limit in (5, 30):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = clients[client_name].get(
+                reverse('recipes-list'), {'limit': limit}
+            )
+        assert response.status_code == 200
+        assert len(response.data['results']) == limit
+        counts.append(len(queries))
+    assert counts[0] == counts[1]
+
+
+def test_create_response_matches_detail(user_client, data):
+    """Ответ POST собран без повторной выборки, но совпадает с GET."""
+    response = user_client.post(
+        reverse('recipes-list'), data.payload, format='json'
+    )
+    assert response.status_code == 201, response.data
+    detail = user_client.get(
+        reverse('recipes-detail', args=(response.data['id'],))
+    )
+    assert response.data == detail.data
+
+
+def test_update_response_matches_detail(user_client, data):
+    url = reverse('recipes-detail', args=(data.recipe.id,))
+    response = user_client.patch(
+        url,
+        {key: data.payload[key] for key in ('name', 'tags', 'ingredients')},
+        format='json',
+    )
+    assert response.status_code == 200, response.data
+    assert response.data == user_client.get(url).data
+    assert response.data['is_favorited'] is True
+
+
+def test_image_variants_fall_back_to_original(user_client, data):
+    """До создания копий варианты ссылаются на исходное фото."""
+    response = user_client.post(
+        reverse('recipes-list'), data.payload, format='json'
+    )
+    detail_url = reverse('recipes-detail', args=(response.data['id'],))
+    variants = response.data['image_variants']
+    assert {
+        url for formats in variants.values() for url in formats.values()
+    } == {response.data['image']}
+    generate_image_variants(
+        name=Recipe.objects.get(pk=response.data['id']).image.name,
+        kind='recipe',
+    )
+    variants = user_client.get(detail_url).data['image_variants']
+    assert all(
+        f'/variants/{variant}/' in url and url.endswith(f'.{image_format}')
+        for variant, formats in variants.items()
+        for image_format, url in formats.items()
+    )
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='запасной поиск для SQLite'
+)
+@pytest.mark.parametrize('query', ('суп', 'СУП', 'Борщ'))
+def test_search_ignores_cyrillic_case(query, data):
+    recipe = data.recipes[1]
+    Recipe.objects.filter(pk=recipe.pk).update(
+        name='Борщ', text='Суп со сметаной'
+    )
+    assert list(Recipe.objects.search(query.lower())) == [recipe]
+    assert list(Recipe.objects.search(query)) == [recipe]
+
+
+def test_create_rejects_unknown_tags_and_ingredients(user_client, data):
+    response = user_client.post(
+        reverse('recipes-list'),
+        {**data.payload, 'tags': [data.tags[0].id, 10 ** 9]},
+        format='json',
+    )
+    assert response.status_code == 400
+    assert list(response.data) == ['tags']
+    response = user_client.post(
+        reverse('recipes-list'),
+        {
+            **data.payload,
+            'ingredients': [{'id': 10 ** 9, 'amount': 1}],
+        },
+        format='json',
+    )
+    assert response.status_code == 400
+    assert list(response.data) == ['ingredients']
+
+
+def test_update_bumps_recipes_cache_once(monkeypatch, user_client, data):
+    """Число сбросов кеша ленты не зависит от числа тегов и ингредиентов."""
+    bumped = []
+    monkeypatch.setattr(signals, 'bump_cache_version', bumped.append)
+    response = user_client.patch(
+        reverse('recipes-detail', args=(data.recipe.id,)),
+        {key: data.payload[key] for key in ('name', 'tags', 'ingredients')},
+        format='json',
+    )
+    assert response.status_code == 200, response.data
+    assert bumped.count(RECIPES_NAMESPACE) == 1
+
+
+def test_signup_keeps_recipes_cache(monkeypatch, anonymous_client, data):
+    bumped = []
+    monkeypatch.setattr(signals, 'bump_cache_version', bumped.append)
+    response = anonymous_client.post(
+        reverse('user-list'),
+        {
+            'email': 'new@example.com',
+            'username': 'new-user',
+            'first_name': 'Имя',
+            'last_name': 'Фамилия',
+            'password': data.password,
+        },
+        format='json',
+    )
+    assert response.status_code == 201, response.data
+    assert RECIPES_NAMESPACE not in bumped
+
+
+def test_cursor_pages_through_equal_created_at(user_client, data):
+    """Курсор с id не теряет и не повторяет рецепты с одинаковым временем."""
+    Recipe.objects.update(created_at=timezone.now())
+    expected = sorted((recipe.id for recipe in data.recipes), reverse=True)
+    url = f'{reverse("recipes-list")}?cursor=&limit=7'
+    pages = []
+    while url:
+        response = user_client.get(url)
+        assert response.status_code == 200
+        # В PostgreSQL это оценка планировщика, в остальных СУБД — COUNT(*).
+        if connection.vendor == 'postgresql':
+            assert isinstance(response.data['count'], int)
+        else:
+            assert response.data['count'] == len(expected)
+        pages.append([recipe['id'] for recipe in response.data['results']])
+        url = response.data['next']
+    assert [pk for page in pages for pk in page] == expected
+    previous_pages = []
+    url = response.data['previous']
+    while url:
+        response = user_client.get(url)
+        previous_pages.append(
+            [recipe['id'] for recipe in response.data['results']]
+        )
+        url = response.data['previous']
+    assert previous_pages == pages[-2::-1]
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    ('junk', base64.b64encode(b'p=2024-01-01|x').decode()),
+    ids=('not-base64', 'bad-position'),
+)
+def test_cursor_rejects_bad_position(cursor, user_client, data):
+    response = user_client.get(reverse('recipes-list'), {'cursor': cursor})
+    assert response.status_code == 404
+
+
+def expected_shopping_list(recipes):
+    amounts = defaultdict(int)
+    for row in RecipeIngredient.objects.filter(recipe__in=recipes).values(
+        'ingredient__name', 'amount'
+    ):
+        amounts[row['ingredient__name']] += row['amount']
+    return sorted((name, 'г', amount) for name, amount in amounts.items())
+
+
+def download(client, export_format, **headers):
+    response = client.get(
+        reverse('recipes-download-shopping-cart'),
+        {'format': export_format},
+        **headers,
+    )
+    response.body = (
+        b''.join(response.streaming_content)
+        if response.streaming
+        else response.content
+    )
+    return response
+
+
+def test_shopping_list_formats(user_client, data):
+    expected = expected_shopping_list(data.recipes[:10])
+    response = download(user_client, 'txt')
+    assert response['Content-Type'] == 'text/plain; charset=utf-8'
+    assert response.body.decode().splitlines() == [
+        f'— {name}, {unit}\t{amount}' for name, unit, amount in expected
+    ]
+    response = download(user_client, 'csv')
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    header, *rows = csv.reader(io.StringIO(response.body.decode()))
+    assert header == list(SHOPPING_LIST_CSV_HEADER)
+    assert rows == [
+        [name, unit, str(amount)] for name, unit, amount in expected
+    ]
+    response = download(user_client, 'json')
+    assert response['Content-Type'] == 'application/json; charset=utf-8'
+    assert json.loads(response.body) == [
+        {'name': name, 'measurement_unit': unit, 'amount': amount}
+        for name, unit, amount in expected
+    ]
+    assert download(user_client, 'xml').status_code == 404
+
+
+def test_shopping_list_etag(user_client, data):
+    etag = download(user_client, 'txt')['ETag']
+    assert download(user_client, 'csv')['ETag'] != etag
+    response = download(user_client, 'txt', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    # Правка рецепта из корзины и новая строка корзины меняют ETag.
+    user_client.patch(
+        reverse('recipes-detail', args=(data.recipe.id,)),
+        {key: data.payload[key] for key in ('name', 'tags', 'ingredients')},
+        format='json',
+    )
+    edited = download(user_client, 'txt', HTTP_IF_NONE_MATCH=etag)
+    assert edited.status_code == 200
+    user_client.post(
+        reverse('recipes-shopping-cart', kwargs={'id': data.other_recipe.id})
+    )
+    added = download(user_client, 'txt', HTTP_IF_NONE_MATCH=edited['ETag'])
+    assert added.status_code == 200
+    assert len({etag, edited['ETag'], added['ETag']}) == 3
+
+
+def test_search_api_ignores_case(anonymous_client, data):
+    Recipe.objects.filter(pk=data.recipe.pk).update(name='Борщ')
+    response = anonymous_client.get(
+        reverse('recipes-list'), {'search': 'БОРЩ'}
+    )
+    assert [recipe['id'] for recipe in response.data['results']] == [
+        data.recipe.id
+    ]
+
+
+def test_short_link_redirect_headers(anonymous_client, data):
+    link = anonymous_client.get(
+        reverse('recipes-get-link', args=(data.recipe.id,))
+    ).data['short-link']
+    path = urlsplit(link).path
+    response = anonymous_client.get(path)
+    assert response.status_code == 302
+    assert response['Location'].endswith(f'/recipes/{data.recipe.id}/')
+    assert set(response['Cache-Control'].split(', ')) == {
+        'public',
+        f'max-age={SHORT_LINK_REDIRECT_MAX_AGE}',
+    }
+    data.recipe.delete()
+    response = anonymous_client.get(path)
+    assert response.status_code == 404
+    assert set(response['Cache-Control'].split(', ')) == {
+        'public',
+        f'max-age={SHORT_LINK_NEGATIVE_TIMEOUT}',
+    }
+    assert anonymous_client.get('/s/missing/').status_code == 404
@@ -0,0 +1,55 @@
+import pytest
+from django.urls import reverse
+
+from recipes.models import Ingredient, Tag
+
+REFERENCES = {
+    'tag-list': lambda: Tag.objects.create(name='Новый', slug='new'),
+    'ingredient-list': lambda: Ingredient.objects.create(
+        name='Новый ингредиент', measurement_unit='г'
+    ),
+}
+
+
+@pytest.mark.parametrize('url_name', REFERENCES)
+def test_not_modified_without_queries(
+    url_name, anonymous_client, data, django_assert_num_queries
+):
+    """Повторный запрос с ETag получает 304, не обращаясь к БД."""
+    url = reverse(url_name)
+    response = anonymous_client.get(url)
+    assert response.status_code == 200
+    assert 'max-age' in response['Cache-Control']
+    with django_assert_num_queries(0):
+        response = anonymous_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize('url_name', REFERENCES)
+def test_etag_changes_after_write(url_name, anonymous_client, data):
+    url = reverse(url_name)
+    etag = anonymous_client.get(url)['ETag']
+    REFERENCES[url_name]()
+    response = anonymous_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+@pytest.mark.parametrize('query', ('ингр', 'ИНГРЕДИЕНТ 1', 'Ент 3'))
+def test_ingredient_search_ignores_case(query, anonymous_client, data):
+    response = anonymous_client.get(
+        reverse('ingredient-list'), {'name': query}
+    )
+    names = [ingredient['name'] for ingredient in response.data]
+    assert names
+    assert all(query.casefold() in name.casefold() for name in names)
+
+
+def test_ingredient_search_sees_new_rows(anonymous_client, data):
+    url = reverse('ingredient-list')
+    assert anonymous_client.get(url, {'name': 'свёкла'}).data == []
+    Ingredient.objects.create(name='Свёкла', measurement_unit='г')
+    response = anonymous_client.get(url, {'name': 'СВЕКЛА'})
+    assert [ingredient['name'] for ingredient in response.data] == ['Свёкла']
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from users.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет таблицу списков покупок с суммами по корзинам, '
+        'выводит расхождения и пересобирает таблицу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести расхождения, без пересборки.',
+        )
+
+    def handle(self, *args, dry_run, **options):
+        with transaction.atomic():
+            stored = self.as_dict(ShoppingListItem.objects.all())
+            expected = self.as_dict(ShoppingListItem.objects.live())
+            diff = sorted(
+                (key, stored.get(key), expected.get(key))
+                for key in stored.keys() | expected.keys()
+                if stored.get(key) != expected.get(key)
+            )
+            for (user_id, ingredient_id), actual, total in diff:
+                self.stdout.write(
+                    f'user={user_id} ingredient={ingredient_id}: '
+                    f'{actual} вместо {total}'
+                )
+            if not dry_run:
+                count = ShoppingListItem.objects.rebuild()
+        if diff and dry_run:
+            raise CommandError(f'Расхождений: {len(diff)}.')
+        self.stdout.write(f'Расхождений: {len(diff)}.')
+        if not dry_run:
+            self.stdout.write(
+                self.style.SUCCESS(f'Таблица пересобрана, строк: {count}.')
+            )
+
+    def as_dict(self, queryset):
+        return {
+            (row['user_id'], row['ingredient_id']): row['total_amount']
+            for row in queryset.values(
+                'user_id', 'ingredient_id', 'total_amount'
+            ).iterator()
+        }
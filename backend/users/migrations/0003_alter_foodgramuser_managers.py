@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:02
+
+import users.querysets
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20241001_2359'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='foodgramuser',
+            managers=[
+                ('objects', users.querysets.FoodgramUserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_foodgramuser_managers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='favorite',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='favorite_to_user', to=settings.AUTH_USER_MODEL, verbose_name='пользователь'),
+        ),
+        migrations.AlterField(
+            model_name='shoppingcart',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='shopping_to_user', to=settings.AUTH_USER_MODEL, verbose_name='пользователь'),
+        ),
+    ]
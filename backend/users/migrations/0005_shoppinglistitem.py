@@ -0,0 +1,56 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def fill_shopping_lists(apps, schema_editor):
+    ShoppingCart = apps.get_model('users', 'ShoppingCart')
+    ShoppingListItem = apps.get_model('users', 'ShoppingListItem')
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(**row)
+            for row in ShoppingCart.objects.filter(
+                recipe__recipe_to_ingredient__isnull=False
+            )
+            .values(
+                'user_id',
+                ingredient_id=F('recipe__recipe_to_ingredient__ingredient'),
+            )
+            .annotate(total_amount=Sum('recipe__recipe_to_ingredient__amount'))
+            .order_by()
+            .iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_search'),
+        ('users', '0004_drop_redundant_user_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.IntegerField(verbose_name='количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.ingredient', verbose_name='ингредиент')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'строка списка покупок',
+                'verbose_name_plural': 'Списки покупок',
+                'ordering': ('user', 'ingredient'),
+                'constraints': [models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_list_item')],
+            },
+        ),
+        migrations.RunPython(
+            fill_shopping_lists, migrations.RunPython.noop
+        ),
+    ]
@@ -10,6 +10,8 @@ from foodgram_backend.constants import (
     LENGTH_LAST_NAME,
 )
 
+from .querysets import FoodgramUserManager, ShoppingListItemQuerySet
+
 
 class FoodgramUser(AbstractUser):
     """Модель пользователя."""
@@ -52,9 +54,21 @@ class FoodgramUser(AbstractUser):
         symmetrical=False,
         blank=True,
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+        editable=False,
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
+    objects = FoodgramUserManager()
+
     class Meta:
         verbose_name = 'пользователь'
         verbose_name_plural = 'Пользователи'
@@ -72,6 +86,7 @@ class Favorite(models.Model):
         verbose_name='пользователь',
         on_delete=models.CASCADE,
         related_name='favorite_to_user',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         to='recipes.Recipe',
@@ -99,6 +114,7 @@ class ShoppingCart(models.Model):
         verbose_name='пользователь',
         on_delete=models.CASCADE,
         related_name='shopping_to_user',
+        db_index=False,
     )
     recipe = models.ForeignKey(
         to='recipes.Recipe',
@@ -118,6 +134,41 @@ class ShoppingCart(models.Model):
         ordering = ('user', 'recipe')
 
 
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента по всем рецептам в корзине пользователя.
+
+    Обновляется приращениями при изменении корзины и рецептов в ней,
+    сверяется с корзинами командой ``check_shopping_lists``.
+    """
+
+    user = models.ForeignKey(
+        FoodgramUser,
+        verbose_name='пользователь',
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        db_index=False,
+    )
+    ingredient = models.ForeignKey(
+        to='recipes.Ingredient',
+        verbose_name='ингредиент',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    total_amount = models.IntegerField(verbose_name='количество')
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'], name='unique_shopping_list_item'
+            )
+        ]
+        verbose_name = 'строка списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        ordering = ('user', 'ingredient')
+
+
 class Follow(models.Model):
     """Промежуточная модель для подписок."""
 
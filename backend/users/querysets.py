@@ -0,0 +1,163 @@
+from collections import defaultdict
+
+from django.contrib.auth.models import UserManager
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Sum,
+    Value,
+    When,
+)
+
+
+class FoodgramUserQuerySet(models.QuerySet):
+    def annotated_fields(self, user):
+        from .models import Follow
+
+        if user.is_authenticated:
+            return self.annotate(
+                is_subscribed=Exists(
+                    Follow.objects.filter(user=user, author=OuterRef('pk'))
+                )
+            )
+        return self.annotate(is_subscribed=Value(False))
+
+
+class FoodgramUserManager(UserManager.from_queryset(FoodgramUserQuerySet)):
+    pass
+
+
+class ShoppingListItemQuerySet(models.QuerySet):
+    """Суммы ингредиентов корзины, которые обновляются приращениями."""
+
+    def live(self, user_ids=None):
+        """Те же суммы, посчитанные заново по корзинам и рецептам."""
+        from .models import ShoppingCart
+
+        carts = ShoppingCart.objects.filter(
+            recipe__recipe_to_ingredient__isnull=False
+        )
+        if user_ids is not None:
+            carts = carts.filter(user_id__in=user_ids)
+        return (
+            carts.values(
+                'user_id',
+                ingredient_id=F('recipe__recipe_to_ingredient__ingredient'),
+            )
+            .annotate(total_amount=Sum('recipe__recipe_to_ingredient__amount'))
+            .order_by()
+        )
+
+    def rebuild(self, user_ids=None):
+        """Пересобирает таблицу (или строки указанных пользователей)."""
+        with transaction.atomic(using=self.db):
+            stale = self if user_ids is None else self.filter(
+                user_id__in=user_ids
+            )
+            stale.delete()
+            return len(
+                self.bulk_create(
+                    (
+                        self.model(**row)
+                        for row in self.live(user_ids).iterator()
+                    ),
+                    batch_size=1000,
+                )
+            )
+
+    def add_recipes(self, carts, sign=1):
+        """Учитывает рецепты, добавленные в корзины (``sign=-1`` — удалённые).
+
+        ``carts`` — пары ``(user_id, recipe_id)``.
+        """
+        from recipes.models import RecipeIngredient
+
+        recipes = defaultdict(list)
+        for user_id, recipe_id in carts:
+            recipes[recipe_id].append(user_id)
+        deltas = defaultdict(lambda: defaultdict(int))
+        for recipe_id, ingredient_id, amount in (
+            RecipeIngredient.objects.filter(recipe_id__in=recipes)
+            .values_list('recipe_id', 'ingredient_id', 'amount')
+            .order_by()
+        ):
+            for user_id in recipes[recipe_id]:
+                deltas[user_id][ingredient_id] += sign * amount
+        self.apply(deltas)
+
+    def change_recipe(self, recipe, old_amounts, new_amounts):
+        """Переносит правку ингредиентов рецепта во все корзины с ним.
+
+        ``old_amounts`` и ``new_amounts`` — словари ``{ingredient_id:
+        amount}`` до и после правки.
+        """
+        delta = {
+            ingredient_id: new_amounts.get(ingredient_id, 0)
+            - old_amounts.get(ingredient_id, 0)
+            for ingredient_id in old_amounts.keys() | new_amounts.keys()
+        }
+        self.apply({user_id: delta for user_id in recipe.cart_user_ids})
+
+    def apply(self, deltas):
+        """Прибавляет ``{user_id: {ingredient_id: delta}}`` к суммам.
+
+        Строки пользователей блокируются, поэтому параллельные изменения
+        одной корзины применяются по очереди. Пользователи с одинаковыми
+        приращениями обновляются одним UPDATE.
+        """
+        from .models import FoodgramUser
+
+        groups = defaultdict(list)
+        for user_id, user_deltas in deltas.items():
+            user_deltas = frozenset(
+                (ingredient_id, delta)
+                for ingredient_id, delta in user_deltas.items()
+                if delta
+            )
+            if user_deltas:
+                groups[user_deltas].append(user_id)
+        if not groups:
+            return
+        with transaction.atomic(using=self.db):
+            list(
+                FoodgramUser.objects.select_for_update()
+                .filter(pk__in=[u for users in groups.values() for u in users])
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+            for user_deltas, user_ids in groups.items():
+                self._apply_group(dict(user_deltas), user_ids)
+
+    def _apply_group(self, delta, user_ids):
+        rows = self.filter(user_id__in=user_ids, ingredient_id__in=delta)
+        existing = set(
+            rows.order_by().values_list('user_id', 'ingredient_id')
+        )
+        if existing:
+            rows.update(
+                total_amount=F('total_amount')
+                + Case(
+                    *(
+                        When(ingredient_id=ingredient_id, then=Value(amount))
+                        for ingredient_id, amount in delta.items()
+                    ),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+        self.bulk_create(
+            self.model(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                total_amount=amount,
+            )
+            for user_id in user_ids
+            for ingredient_id, amount in delta.items()
+            if amount > 0 and (user_id, ingredient_id) not in existing
+        )
+        if min(delta.values()) < 0:
+            rows.filter(total_amount__lte=0).delete()